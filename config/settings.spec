@@ -100,6 +100,52 @@ axes_align = boolean(default=True)
 # enlarge the whole figure to include legends
 resize = boolean(default=False)
 
+# render png/tiff in horizontal bands of this many pixels (0: at once)
+tile_height = integer(min=0, default=0)
+
+# png compression level (-1: the encoder of matplotlib)
+png_compression = integer(min=-1, max=9, default=-1)
+
+# png row filter and zlib strategy
+png_filter = option("none", "sub", "up", "paeth", default="none")
+png_strategy = option("default", "filtered", "huffman", "rle", default="default")
+
+# write a palette png if the image has at most this many colors (0: never)
+png_palette = integer(min=0, max=256, default=0)
+
+# render the data of the axes in this many processes (png/webp output)
+panel_jobs = integer(min=1, default=1)
+
+# number of decimals of the coordinates in svg output (-1: unchanged)
+svg_precision = integer(min=-1, default=-1)
+
+# text in svg output as glyphs in <defs> (path) or as <text> (none)
+# (empty: the svg.fonttype rc setting)
+svg_fonttype = option("", "path", "none", default="")
+
+# directory with a copy of the compiled usetex strings, shared by all
+# processes (empty: only the cache directory of matplotlib)
+tex_cache = string(default="")
+
+# number of dvipng jobs which render the usetex strings in parallel
+# (all strings are compiled with one latex run)
+tex_jobs = integer(min=1, default=4)
+
+# quality of webp output (requires Pillow)
+webp_quality = integer(min=0, max=100, default=80)
+webp_lossless = boolean(default=False)
+
+# canvas of the figure, also used to measure the layout (the vector
+# backends measure with their font metrics, the axes and legends move at
+# most 3 pixels compared to agg). Output formats are written by their own
+# backend (cairo requires pycairo and writes png/pdf/ps/svg itself)
+backend = option("agg", "cairo", "pdf", "svg", default="agg")
+
+# memory (MB) to draw the figure, reduced by decimating lines,
+# rasterising dense artists and measuring the texts at a lower dpi
+# (0: no limit)
+memory_budget = float(min=0, default=0)
+
 [rc]
 #     font.family = string(default="Palatino")
     font.family = string(default="Ubuntu")
@@ -11,3 +11,6 @@ from __future__ import (division, absolute_import, unicode_literals,
 
 from .figure import Figure
 from .exceptions import PyfigError
+from .assets import preload_assets, clear_assets
+from .fonts import warmup
+from .report import Report
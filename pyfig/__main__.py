@@ -0,0 +1,16 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Run the pyfig command with python -m pyfig"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
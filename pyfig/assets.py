@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Process wide cache of decoded images (logo)"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import os
+import threading
+
+import matplotlib.image
+
+from .exceptions import PyfigError
+
+CACHE = {}
+LOCK = threading.Lock()
+
+
+def load_image(fname):
+    """Return the decoded image, cached on path and modification time
+       The array is read-only, since it is shared by all figures"""
+
+    path = os.path.realpath(fname)
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        raise PyfigError("Image {0} not available".format(fname))
+
+    with LOCK:
+        if path in CACHE and CACHE[path][0] == mtime:
+            return CACHE[path][1]
+
+    img = matplotlib.image.imread(path)
+    img.flags.writeable = False
+    with LOCK:
+        CACHE[path] = (mtime, img)
+    return img
+
+
+def preload_assets(*fnames):
+    """Decode the images (e.g. the logo) before the first figure"""
+    for fname in fnames:
+        if fname:
+            load_image(fname)
+
+
+def clear_assets():
+    """Empty the image cache"""
+    with LOCK:
+        CACHE.clear()
@@ -10,17 +10,24 @@ from __future__ import (division, unicode_literals, absolute_import,
                         print_function)
 
 import collections
+import functools
+import itertools
 import re
-import sys  # pylint: disable=W0611
+import sys
 import logging
 import numbers
 
 import numpy
 import matplotlib.figure
+import matplotlib.cm
+import matplotlib.collections
+import matplotlib.colors
+import matplotlib.lines
+import matplotlib.patches
 import six
 
 from .exceptions import PyfigError
-from . import tools
+from . import stream, tools
 
 MARKERSIZE = {
     "+": 2,
@@ -37,9 +44,55 @@ MARKERSIZE = {
 logger = logging.getLogger(__name__)
 
 
+def get_colormap(name):
+    """The matplotlib colormap name (None if there is none)"""
+    if hasattr(matplotlib, "colormaps"):
+        return matplotlib.colormaps.get(name)
+    # older versions of matplotlib
+    try:
+        return matplotlib.cm.get_cmap(name)
+    except ValueError:
+        return None
+
+
+def recorded(func):
+    """Add the call to the display list of the figure (if recorded)"""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        """Record and call func"""
+        display = getattr(self.fig, "display", None)
+        if display is None:
+            return func(self, *args, **kwargs)
+        with display.call(self, func.__name__, args, kwargs):
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
+def unrecorded(func):
+    """Do not record the calls func makes on the axes (a matplotlib
+       method which calls the recorded setters itself)"""
+
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        """Call func with the display list paused"""
+        display = getattr(self.fig, "display", None)
+        if display is None:
+            return func(self, *args, **kwargs)
+        with display.paused():
+            return func(self, *args, **kwargs)
+    return wrapper
+
+
 class Axes(matplotlib.axes.Axes):
     """Axes with some extra functions"""
 
+    # matplotlib sets the limits itself when autoscaling and sharing axes
+    autoscale_view = unrecorded(matplotlib.axes.Axes.autoscale_view)
+    if hasattr(matplotlib.axes.Axes, "sharex"):
+        sharex = unrecorded(matplotlib.axes.Axes.sharex)
+        sharey = unrecorded(matplotlib.axes.Axes.sharey)
+
     def __init__(self, fig, *args, **kwargs):
         self.fig = fig
         if "row" in kwargs and "col" in kwargs:
@@ -73,15 +126,233 @@ class Axes(matplotlib.axes.Axes):
         self.loc = "upper right"
         self.xaxis.tick_bottom()
 
+    @recorded
     def plot(self, *args, **kwargs):
         return self._plot1("plot", *args, **kwargs)
 
+    @recorded
+    def plot_stream(self, source, xlim=None, envelope=0.3,
+                    chunksize=100000, **kwargs):
+        """Plot a series which does not have to fit in memory
+           source: csv/npy file, iterable of chunks or a function which
+           returns the chunks (see stream.iter_chunks)
+           The data is reduced to a bin for each pixel column, the mean
+           is plotted as line and min/max as envelope (with alpha)"""
+        # (too many arguments) pylint: disable=R0913
+
+        if xlim is None and self.xlim_manual:
+            xlim = (self.xlim_manual[0] if len(self.xlim_manual) == 1 else
+                    self.xlim_manual)
+        if xlim is None or None in xlim:
+            if not (isinstance(source, six.string_types) or
+                    callable(source)):
+                raise PyfigError(
+                    "Stream without xlim should be a file or a function")
+            extent = stream.get_extent(source, chunksize)
+            # only the missing ends are taken from the data
+            xlim = extent if xlim is None else tuple(
+                extent[index] if value is None else value
+                for index, value in enumerate(xlim))
+
+        nbins = max(1, int(self.get_axpos()[2] * self.fig.get_figwidth() *
+                           self.fig.settings["dpi"]))
+        centers, mins, maxs, means = stream.bin_stream(
+            source, xlim[0], xlim[1], nbins, chunksize)
+
+        result = self.plot(centers, means, **kwargs)
+        if envelope > 0:
+            # like plot, the envelope is not switched in horizontal mode
+            matplotlib.axes.Axes.fill_between(
+                self, centers, mins, maxs, color=result[0].get_color(),
+                alpha=envelope, linewidth=0)
+        return result
+
+    @recorded
+    def heatmap(self, data, colors=("white", "red"), reduce="mean",
+                extent=None, legend=None, **kwargs):
+        """Plot a 2d array (or memmap) as image
+           The data is reduced (mean or max) to the pixels of the axes
+           colors: list of (pyfig) colors for the colormap (mix colors
+           are taken for the label), a single color (from white), or the
+           name of a matplotlib colormap
+           extent: (xmin, xmax, ymin, ymax), default the indices
+           legend: values which are added to the legend as colored boxes
+           (default a box with the label)
+           Other kwargs (vmin, vmax, ...) are passed to imshow"""
+        # (too many arguments) pylint: disable=R0913
+
+        label_format = kwargs.pop("legend_format", "{0}")
+        label, leg_place = self._get_label(kwargs)
+        axpos = self.get_axpos()
+        dpi = self.fig.settings["dpi"]
+        shape = (max(1, int(axpos[3] * self.fig.get_figheight() * dpi)),
+                 max(1, int(axpos[2] * self.fig.get_figwidth() * dpi)))
+        if self.horizontal:
+            shape = shape[::-1]
+        data = tools.as_array(data)
+        matrix = stream.reduce_matrix(data, shape, reduce)
+
+        cmap = (get_colormap(colors) if
+                isinstance(colors, six.string_types) else None)
+        if cmap is None:
+            if isinstance(colors, six.string_types):
+                colors = ("white", colors)
+            rgba = []
+            for color in colors:
+                elem = {"color": color}
+                self._update_mix(elem, label, leg_place)
+                self._update_color(elem)
+                rgba.append(matplotlib.colors.to_rgba(elem["color"],
+                                                      elem.get("alpha")))
+            cmap = matplotlib.colors.LinearSegmentedColormap.from_list(
+                "pyfig", rgba)
+        if extent is None:
+            extent = (0, data.shape[1], 0, data.shape[0])
+        if self.horizontal:
+            matrix = matrix.transpose()
+            extent = (extent[2], extent[3], extent[0], extent[1])
+
+        kwargs.setdefault("aspect", "auto")
+        kwargs.setdefault("interpolation", "nearest")
+        image = matplotlib.axes.Axes.imshow(
+            self, matrix, cmap=cmap, extent=extent, origin="lower",
+            **kwargs)
+
+        if legend is not None:
+            boxes = [(cmap(image.norm(value)), label_format.format(value))
+                     for value in legend]
+        else:
+            boxes = [(cmap(1.0), label)] if label else []
+        for color, box_label in boxes:
+            self.fig.add_line(
+                matplotlib.patches.Rectangle(
+                    (0, 0), 1, 1, facecolor=color, edgecolor="black",
+                    linewidth=0.5),
+                box_label, leg_place)
+        return image
+
+    @recorded
+    def plot_many(self, x, Y, colors="mix", labels=None, **kwargs):
+        """Plot the rows of Y (series x points) against x as one
+           LineCollection, x can be 1d or have the shape of Y
+           colors/labels: one value or a list with a value per row
+           The colors (also mix) are resolved once for each distinct
+           (label, color), with one legend entry for each label"""
+        # (invalid name Y) pylint: disable=C0103
+
+        Y = tools.as_array(Y, numeric=True)
+        if Y.ndim == 1:
+            Y = Y.reshape(1, -1)
+        nseries = len(Y)
+        leg_place = kwargs.pop("leg_place", "fig")
+        labels = (list(labels) if isinstance(labels, (list, tuple)) else
+                  [labels] * nseries)
+        colors = (list(colors) if isinstance(colors, list) else
+                  [colors] * nseries)
+        if len(labels) != nseries or len(colors) != nseries:
+            raise PyfigError("plot_many: {0} series, {1} labels, "
+                             "{2} colors".format(nseries, len(labels),
+                                                 len(colors)))
+
+        keys = numpy.array(["{0}\0{1}".format(label, color)
+                            for label, color in zip(labels, colors)])
+        _keys, first, inverse = numpy.unique(keys, return_index=True,
+                                             return_inverse=True)
+        rgba = numpy.empty((len(first), 4))
+        linestyles = [None] * len(first)
+        # in order of appearance, such that mix colors are as with plot
+        for index in numpy.argsort(first):
+            label = labels[first[index]]
+            elem = {"color": colors[first[index]]}
+            self._update_mix(elem, label, leg_place)
+            self._update_color(elem)
+            rgba[index] = matplotlib.colors.to_rgba(
+                elem["color"], elem.get("alpha", kwargs.get("alpha")))
+            linestyles[index] = elem.get("linestyle",
+                                         kwargs.get("linestyle", "solid"))
+            if label is not None and label != "_nolegend_":
+                self.fig.add_line(
+                    matplotlib.lines.Line2D(
+                        [], [], color=rgba[index],
+                        linestyle=linestyles[index],
+                        linewidth=kwargs.get(
+                            "linewidth",
+                            matplotlib.rcParams["lines.linewidth"])),
+                    label, leg_place)
+
+        segments = numpy.empty(Y.shape + (2,))
+        segments[..., 0] = tools.as_array(x, numeric=True)
+        segments[..., 1] = Y
+        kwargs.pop("alpha", None)
+        kwargs.pop("linestyle", None)
+        collection = matplotlib.collections.LineCollection(
+            segments, colors=rgba[inverse.ravel()],
+            linestyles=[linestyles[index] for index in inverse.ravel()],
+            **kwargs)
+        self.add_collection(collection, autolim=True)
+        self._autoscale_data()
+        return collection
+
+    @recorded
+    def fan(self, data, x=None, bands=(95, 90, 50), color="mix",
+            colors=None, labels=None, median=True, **kwargs):
+        """Fan chart of an ensemble (members x time array or memmap)
+           bands: central intervals (percent), drawn as filled polygons
+           color: (pyfig) color of the median and the bands
+           colors: a (pyfig) color for each band, default color with
+           increasing alpha
+           labels: a legend label for each band
+           The label (in kwargs) is used for the median"""
+        # (too many arguments) pylint: disable=R0913
+
+        label, leg_place = self._get_label(kwargs)
+        data = tools.as_array(data)
+        # widest band first (drawn below the narrower bands)
+        widths = sorted(bands, reverse=True)
+        percentiles = sorted(set([50] + [(100 - band) / 2 for band in bands] +
+                                 [100 - (100 - band) / 2 for band in bands]))
+        values = dict(zip(percentiles, stream.get_percentiles(
+            data, percentiles)))
+        if x is None:
+            x = numpy.arange(data.shape[1])
+        x = tools.as_array(x, numeric=True)
+
+        elem = {"color": color}
+        self._update_mix(elem, label, leg_place)
+        if colors is None:
+            # the alpha of each band replaces the alpha of the color
+            base = self.parse_color(elem["color"])["color"]
+            alphas = numpy.linspace(0.15, 0.45, len(bands))
+            colors = [matplotlib.colors.to_rgba(base,
+                                                alphas[widths.index(band)])
+                      for band in bands]
+        labels = labels or [None] * len(bands)
+
+        polygons = []
+        for band, band_color, band_label in sorted(
+                zip(bands, colors, labels),
+                key=lambda elem: -elem[0]):
+            lower = values[(100 - band) / 2]
+            upper = values[100 - (100 - band) / 2]
+            polygons.extend(self.fill(
+                numpy.concatenate((x, x[::-1])),
+                numpy.concatenate((lower, upper[::-1])),
+                color=band_color, linewidth=0, label=band_label,
+                leg_place=leg_place))
+        lines = (self.plot(x, values[50], color=elem["color"], label=label,
+                           leg_place=leg_place, **kwargs)
+                 if median else [])
+        return polygons, lines
+
+    @recorded
     def axvspan(self, *args, **kwargs):
         return self._plot2("axvspan", *args, **kwargs)
 
+    @recorded
     def fill(self, *args, **kwargs):
         return self._plot1("fill", *args, **kwargs)
 
+    @recorded
     def axhline(self, *args, **kwargs):
         """ax.axhline function"""
         label, leg_place = self._get_label(kwargs)
@@ -95,6 +366,7 @@ class Axes(matplotlib.axes.Axes):
             self.fig.add_line(result, label, leg_place)
         return result
 
+    @recorded
     def axvline(self, *args, **kwargs):
         """ax.axvline function"""
         label, leg_place = self._get_label(kwargs)
@@ -112,8 +384,18 @@ class Axes(matplotlib.axes.Axes):
         """Determine the ax position"""
         return self.fig.get_axpos(self.row, self.col)
 
+    @staticmethod
+    def _as_arrays(args):
+        """Views on array-like args (memmap, buffer, arrow), no copies"""
+        return tuple(
+            tools.as_array(arg) if (tools.is_array_like(arg) and
+                                    not isinstance(arg, (list, tuple))) else
+            arg
+            for arg in args)
+
     def _plot1(self, ax_func, *args, **kwargs):
         """ax.ax_function, result[0] in legend"""
+        args = self._as_arrays(args)
         label, leg_place = self._get_label(kwargs)
         self._update_mix(kwargs, label, leg_place)
         self._update_color(kwargs)
@@ -132,6 +414,7 @@ class Axes(matplotlib.axes.Axes):
             self.fig.add_line(result, label, leg_place)
         return result
 
+    @recorded
     def pie(self, *args, **kwargs):
         """ax.pie function"""
 
@@ -164,8 +447,13 @@ class Axes(matplotlib.axes.Axes):
                 self.fig.add_line(line, legend)
         return result
 
+    @recorded
     def bar(self, left, height, *args, **kwargs):
         """ax.bar function"""
+        left, height = self._as_arrays((left, height))
+        for key in ("bottom", "width"):
+            if key in kwargs:
+                kwargs[key] = self._as_arrays((kwargs[key],))[0]
         label, leg_place = self._get_label(kwargs)
         self._update_mix(kwargs, label, leg_place)
         self._update_color(kwargs)
@@ -195,8 +483,13 @@ class Axes(matplotlib.axes.Axes):
                 mybar.set_hatch(hatch)
         return result
 
+    @recorded
     def errorbar(self, xcoord, ycoord, *args, **kwargs):
         """ax.errorbar function"""
+        xcoord, ycoord = self._as_arrays((xcoord, ycoord))
+        for key in ("xerr", "yerr"):
+            if key in kwargs:
+                kwargs[key] = self._as_arrays((kwargs[key],))[0]
         label, leg_place = self._get_label(kwargs)
         self._update_mix(kwargs, label, leg_place)
         self._update_color(kwargs)
@@ -217,6 +510,7 @@ class Axes(matplotlib.axes.Axes):
             self.fig.add_line(result[0], label, leg_place)
         return result
 
+    @recorded
     def text(self, x, y, text, **kwargs):
         """ax.text function"""
         text, kwargs = self.fig.latex(text, kwargs)
@@ -225,6 +519,7 @@ class Axes(matplotlib.axes.Axes):
         self._update_color(kwargs)
         return matplotlib.axes.Axes.text(self, x, y, text, **kwargs)
 
+    @recorded
     def set_ylabel(self, text, **kwargs):
         """Add some latex tricks"""
         text, kwargs = self.fig.latex(text, kwargs)
@@ -238,6 +533,7 @@ class Axes(matplotlib.axes.Axes):
             result = matplotlib.axes.Axes.set_ylabel(self, text, **kwargs)
         return result
 
+    @recorded
     def set_xlabel(self, text, **kwargs):
         """set xlabel with latex tricks"""
         text, kwargs = self.fig.latex(text, kwargs)
@@ -282,12 +578,14 @@ class Axes(matplotlib.axes.Axes):
                 logger.error("No markersize correction for %s",
                              repr(kwargs["marker"]))
 
+    @recorded
     def set_open(self):
         """Set the ax to not have upper and right frame"""
         self.spines["top"].set_color("none")
         self.spines["right"].set_color("none")
         self.yaxis.set_ticks_position("left")
 
+    @recorded
     def set_ylim(self, *args, **kwargs):
         """Set the xlimits (taking care of horizontal)"""
         if "auto" not in kwargs:
@@ -318,6 +616,7 @@ class Axes(matplotlib.axes.Axes):
             matplotlib.axes.Axes.get_ylabel,
             *args, **kwargs)
 
+    @recorded
     def set_xticks(self, *args, **kwargs):
         """set xticks"""
         return self.switch_horizontal(
@@ -325,6 +624,7 @@ class Axes(matplotlib.axes.Axes):
             matplotlib.axes.Axes.set_xticks,
             *args, **kwargs)
 
+    @recorded
     def set_yticks(self, *args, **kwargs):
         """set yticks"""
         return self.switch_horizontal(
@@ -332,6 +632,7 @@ class Axes(matplotlib.axes.Axes):
             matplotlib.axes.Axes.set_yticks,
             *args, **kwargs)
 
+    @recorded
     def set_xticklabels(self, labels, **kwargs):
         """set xticklabels"""
         labels, kwargs = self.fig.latex(labels, kwargs)
@@ -345,6 +646,7 @@ class Axes(matplotlib.axes.Axes):
                 self, labels, **kwargs)
         return result
 
+    @recorded
     def set_yticklabels(self, labels, **kwargs):
         """set yticklabels"""
         labels, kwargs = self.fig.latex(labels, kwargs)
@@ -400,6 +702,16 @@ class Axes(matplotlib.axes.Axes):
             matplotlib.axes.Axes.get_yticklabels,
             *args, **kwargs)
 
+    def _autoscale_data(self):
+        """Autoscale to the data limits of collections which are added
+           already swapped (with horizontal off, as set_xlim/set_ylim swap)"""
+        horizontal = self.horizontal
+        self.horizontal = False
+        try:
+            matplotlib.axes.Axes.autoscale_view(self)
+        finally:
+            self.horizontal = horizontal
+
     def switch_horizontal(self, func_horizontal, func, *args, **kwargs):
         """Run function based on wheter horizontal is set"""
         if self.horizontal:
@@ -410,6 +722,7 @@ class Axes(matplotlib.axes.Axes):
             result = func(self, *args, **kwargs)
         return result
 
+    @recorded
     def set_xlim(self, *args, **kwargs):
         """Set the xlimits (taking care of horizontal)"""
         if "auto" not in kwargs:
@@ -426,6 +739,7 @@ class Axes(matplotlib.axes.Axes):
             matplotlib.axes.Axes.get_xlim,
             *args, **kwargs)
 
+    @recorded
     def set_xstyle(self, style):
         """Set the style of x-axis for the date"""
 
@@ -451,6 +765,7 @@ class Axes(matplotlib.axes.Axes):
                 matplotlib.dates.WeekdayLocator(
                     byweekday=matplotlib.dates.SU, interval=2))
 
+    @recorded
     def barplot(self, data, labels, colors, **kwargs):
         """Bar plot"""
 
@@ -469,39 +784,40 @@ class Axes(matplotlib.axes.Axes):
         options["house_width"] = ((1 - options["house_distance"]) *
                                   options["house_space"])
 
+        ncity = len(labels["city"])
+        if ncity == 0:
+            raise PyfigError("Empty barplot")
+        # the bars of each colour group (per hatch) and all error bars are
+        # drawn as single collections
+        patches = collections.OrderedDict()
+        errors = collections.defaultdict(list)
         for house in range(len(labels["house"])):
-            yoff = numpy.zeros(len(labels["city"]))
+            yoff = numpy.zeros(ncity)
             for floor in range(len(labels["floor"])):
-                non_zeros = []
-                bar_data = []
-                indent = []
-                for city in range(len(labels["city"])):
-                    city_values = [
-                        (value, 0, 0) if isinstance(value, numbers.Number) else
-                        value
-                        for key, value in data.items()
-                        if (labels["city"][city] in key or
-                            labels["city"] == [None]) and
-                        (labels["house"][house] in key or
-                         labels["house"] == [None]) and
-                        (labels["floor"][floor] in key or
-                         labels["floor"] == [None])]
-                    if len(city_values) > 0:
-                        bar_data.append(numpy.sum(city_values, axis=0))
-                        non_zeros.append(city)
-                    else:
-                        bar_data.append([0, 0, 0])
-                    indent.append(
-                        city +
-                        0.5 * (options["city_distance"] +
-                               options["house_distance"] *
-                               options["house_space"]) +
-                        house * options["house_space"])
-
-                if len(bar_data) == 0:
-                    raise PyfigError("Empty barplot")
-                bar_data = numpy.array(bar_data)
-                indent = numpy.array(indent)
+                bar_data = numpy.zeros((ncity, 3))
+                non_zeros = numpy.zeros(ncity, dtype=bool)
+                for key, value in data.items():
+                    if not ((labels["house"][house] in key or
+                             labels["house"] == [None]) and
+                            (labels["floor"][floor] in key or
+                             labels["floor"] == [None])):
+                        continue
+                    for city in range(ncity):
+                        if not (labels["city"][city] in key or
+                                labels["city"] == [None]):
+                            continue
+                        if isinstance(value, numbers.Number):
+                            bar_data[city, 0] += value
+                        else:
+                            bar_data[city] += tools.as_array(value,
+                                                             numeric=True)
+                        non_zeros[city] = True
+                indent = (numpy.arange(ncity) +
+                          0.5 * (options["city_distance"] +
+                                 options["house_distance"] *
+                                 options["house_space"]) +
+                          house * options["house_space"])
+
                 label, color = self._get_barcolor(labels, colors,
                                                   house, floor)
 #                 ax.plot(
@@ -512,26 +828,31 @@ class Axes(matplotlib.axes.Axes):
                 if isinstance(color, list) and None in color:
                     color = None
                 if color is not None:
-                    self.bar(
-                        indent[non_zeros],
-                        bar_data[non_zeros, 0],
-                        width=options["house_width"],
-                        color=color,
-                        label=label,
-                        bottom=yoff[non_zeros],
-                        leg_place=options["leg_place"])
+                    for patch in self._bar_patches(
+                            indent[non_zeros],
+                            bar_data[non_zeros, 0],
+                            width=options["house_width"],
+                            color=color,
+                            label=label,
+                            bottom=yoff[non_zeros],
+                            leg_place=options["leg_place"]):
+                        patches.setdefault((house, floor, patch.get_hatch()),
+                                           []).append(patch)
                 if bar_data[:, 1:].sum() > 0:
-                    self.errorbar(
-                        indent[non_zeros] + 0.5 * options["house_width"],
-                        bar_data[non_zeros, 0] + yoff[non_zeros],
-                        yerr=bar_data[non_zeros, 1:].transpose(),
-                        fmt="o" if color is None else "none",
-                        ecolor="black",
-                        color="black",
-                        linewidth=0.6,
-                        capsize=options["capsize"])
+                    xvals = indent[non_zeros] + 0.5 * options["house_width"]
+                    yvals = bar_data[non_zeros, 0] + yoff[non_zeros]
+                    errors["x"].append(xvals)
+                    errors["y"].append(yvals)
+                    errors["low"].append(yvals - bar_data[non_zeros, 1])
+                    errors["high"].append(yvals + bar_data[non_zeros, 2])
+                    if color is None:
+                        errors["points_x"].append(xvals)
+                        errors["points_y"].append(yvals)
                 yoff += bar_data[:, 0]
 
+        self._bar_collections(patches)
+        self._errorbar_collection(errors, options["capsize"])
+
         self.set_xticks(numpy.arange(len(labels["city"])) + 0.5)
         self.set_xticklabels(["{0}".format(label).replace("__", "\n")
                               for label in labels["city"]])
@@ -540,6 +861,88 @@ class Axes(matplotlib.axes.Axes):
         for tick in self.get_xticklines():
             tick.set_markersize(0)
 
+    def _bar_patches(self, left, height, width, bottom, **kwargs):
+        """Rectangles as ax.bar would create them (without adding them)"""
+        label, leg_place = self._get_label(kwargs)
+        self._update_mix(kwargs, label, leg_place)
+        self._update_color(kwargs)
+
+        colors = kwargs.pop("color")
+        if not isinstance(colors, list):
+            colors = [colors]
+        hatches = kwargs.pop("hatch", None)
+        if not isinstance(hatches, list):
+            hatches = [hatches]
+        props = dict((key, value) for key, value in kwargs.items()
+                     if key in ("alpha", "linestyle", "linewidth",
+                                "edgecolor"))
+
+        patches = []
+        for xval, yval, bval, color, hatch in zip(
+                left, height, bottom,
+                itertools.cycle(colors), itertools.cycle(hatches)):
+            if self.horizontal:
+                xy, bar_w, bar_h = (bval, xval), yval, width
+            else:
+                xy, bar_w, bar_h = (xval, bval), width, yval
+            patches.append(matplotlib.patches.Rectangle(
+                xy, bar_w, bar_h, facecolor=color, hatch=hatch, **props))
+        if label and len(patches) > 0:
+            self.fig.add_line(patches[0], label, leg_place)
+        return patches
+
+    def _bar_collections(self, patches):
+        """Add the bars, one collection for each colour group and hatch"""
+        for (_house, _floor, hatch), group in patches.items():
+            collection = matplotlib.collections.PatchCollection(
+                group, match_original=True)
+            if hatch:
+                collection.set_hatch(hatch)
+            if hasattr(collection, "sticky_edges"):
+                # bars start at zero, as with ax.bar
+                sticky = (collection.sticky_edges.x if self.horizontal else
+                          collection.sticky_edges.y)
+                sticky.append(0)
+            self.add_collection(collection, autolim=True)
+        self._autoscale_data()
+
+    def _errorbar_collection(self, errors, capsize):
+        """Add all the errorbars as one LineCollection and one line of caps"""
+        if len(errors["x"]) == 0:
+            return
+        xvals = numpy.concatenate(errors["x"])
+        yvals = numpy.concatenate(errors["y"])
+        low = numpy.concatenate(errors["low"])
+        high = numpy.concatenate(errors["high"])
+
+        segments = numpy.empty((len(xvals), 2, 2))
+        segments[:, :, 0] = xvals[:, numpy.newaxis]
+        segments[:, 0, 1] = low
+        segments[:, 1, 1] = high
+        if self.horizontal:
+            segments = segments[:, :, ::-1]
+        self.add_collection(matplotlib.collections.LineCollection(
+            segments, colors="black", linewidths=0.6), autolim=True)
+
+        caps = (numpy.concatenate((xvals, xvals)),
+                numpy.concatenate((low, high)))
+        if self.horizontal:
+            caps = caps[::-1]
+        self.add_line(matplotlib.lines.Line2D(
+            caps[0], caps[1], linestyle="none", color="black",
+            marker="|" if self.horizontal else "_",
+            markersize=2 * capsize))
+
+        if len(errors["points_x"]) > 0:
+            points = (numpy.concatenate(errors["points_x"]),
+                      numpy.concatenate(errors["points_y"]))
+            if self.horizontal:
+                points = points[::-1]
+            self.add_line(matplotlib.lines.Line2D(
+                points[0], points[1], linestyle="none", color="black",
+                marker="o", linewidth=0.6))
+        self._autoscale_data()
+
     def _get_barcolor(self, labels, colors, house, floor):
         """Get the color of the bars"""
 
@@ -646,6 +1049,10 @@ class Axes(matplotlib.axes.Axes):
         result["color"] = color
         return result
 
+    def sort_key(self):
+        """Key to sort the axes on row, col"""
+        return self.min_row, self.min_col
+
     def __lt__(self, other):
         if isinstance(other, six.string_types):
             result = False
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The canvas of the figure (backend setting) and the renderer which
+measures the layout
+
+The layout passes draw with a renderer which only measures the texts,
+without drawing any pixels. Agg measures with its own (hinted) font
+metrics, the vector backends with the font metrics of the pdf or svg
+renderer. The texts are measured at the dpi of the figure, such that
+the positions of the axes and legends of the vector backends differ
+from the agg layout by at most LAYOUT_TOLERANCE pixels (at 100 dpi).
+The extents of long texts can differ a few percent more."""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import importlib
+
+import matplotlib.backend_bases
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.backends.backend_pdf import FigureCanvasPdf, RendererPdf
+from matplotlib.backends.backend_svg import FigureCanvasSVG, RendererSVG
+import six
+
+from .exceptions import PyfigError
+
+# the raster canvases (imported when used, cairo requires pycairo)
+CANVASES = {
+    "agg": ("matplotlib.backends.backend_agg", "FigureCanvasAgg"),
+    "cairo": ("matplotlib.backends.backend_cairo", "FigureCanvasCairo")}
+VECTOR = ("pdf", "svg")
+# the backends which measure the layout with a MeasureRenderer
+MEASURED = ("agg",) + VECTOR
+# the output formats which cairo can write
+CAIRO_FORMATS = ("png", "pdf", "ps", "eps", "svg", "svgz", "rgba", "raw")
+LAYOUT_TOLERANCE = 3
+
+
+def get_canvas(backend):
+    """The canvas class of backend"""
+    if backend == "pdf":
+        return PdfCanvas
+    if backend == "svg":
+        return SvgCanvas
+    module, name = CANVASES[backend]
+    try:
+        return getattr(importlib.import_module(module), name)
+    except ImportError as err:
+        raise PyfigError("Backend {0} not available: {1}".format(
+            backend, err))
+
+
+def get_metrics_renderer(backend, fig):
+    """A renderer, only used for its text metrics, and the scale of
+       its metrics to pixels at the dpi of fig"""
+    if backend == "agg":
+        # the text metrics do not depend on the size of the canvas
+        return RendererAgg(1, 1, fig.dpi), 1
+    width, height = fig.get_figwidth() * 72, fig.get_figheight() * 72
+    if backend == "pdf":
+        return RendererPdf(None, 72, height, width), fig.dpi / 72
+    return RendererSVG(width, height, six.StringIO()), fig.dpi / 72
+
+
+class MeasureRenderer(matplotlib.backend_bases.RendererBase):
+    """Renderer which only computes the positions of the texts
+       (with the metrics of the backend) and draws nothing"""
+
+    def __init__(self, backend, fig):
+        matplotlib.backend_bases.RendererBase.__init__(self)
+        self.dpi = fig.dpi
+        self.width = fig.get_figwidth() * self.dpi
+        self.height = fig.get_figheight() * self.dpi
+        self.key = (self.dpi, self.width, self.height)
+        self.metrics, self.scale = get_metrics_renderer(backend, fig)
+
+    def get_text_width_height_descent(self, s, prop, ismath):
+        width, height, descent = self.metrics.get_text_width_height_descent(
+            s, prop, ismath)
+        return width * self.scale, height * self.scale, descent * self.scale
+
+    def points_to_pixels(self, points):
+        return points * self.dpi / 72
+
+    def get_canvas_width_height(self):
+        return self.width, self.height
+
+    def flipy(self):
+        return False
+
+    def option_scale_image(self):
+        return True
+
+    def draw_path(self, gc, path, transform, rgbFace=None):
+        pass
+
+    def draw_markers(self, gc, marker_path, marker_trans, path, trans,
+                     rgbFace=None):
+        # (too many arguments) pylint: disable=R0913
+        pass
+
+    def draw_path_collection(self, *args, **kwargs):
+        pass
+
+    def draw_quad_mesh(self, *args, **kwargs):
+        pass
+
+    def draw_gouraud_triangles(self, *args, **kwargs):
+        pass
+
+    def draw_image(self, gc, x, y, im, transform=None):
+        # (too many arguments) pylint: disable=R0913
+        pass
+
+    def draw_text(self, gc, x, y, s, prop, angle, ismath=False, mtext=None):
+        # (too many arguments) pylint: disable=R0913
+        pass
+
+    def draw_tex(self, gc, x, y, s, prop, angle, mtext=None):
+        # (too many arguments) pylint: disable=R0913
+        pass
+
+
+class MeasureCanvas(object):
+    """Canvas (mixin) which measures with a MeasureRenderer"""
+    # (too few public methods) pylint: disable=R0903
+
+    backend = None
+    renderer = None
+
+    def get_renderer(self):
+        """The (cached) renderer at the size and dpi of the figure"""
+        fig = self.figure
+        key = (fig.dpi, fig.get_figwidth() * fig.dpi,
+               fig.get_figheight() * fig.dpi)
+        if self.renderer is None or self.renderer.key != key:
+            self.renderer = MeasureRenderer(self.backend, fig)
+        return self.renderer
+
+
+class PdfCanvas(MeasureCanvas, FigureCanvasPdf):
+    """Pdf canvas which measures with the pdf font metrics"""
+    backend = "pdf"
+
+
+class SvgCanvas(MeasureCanvas, FigureCanvasSVG):
+    """Svg canvas which measures with the svg font metrics"""
+    backend = "svg"
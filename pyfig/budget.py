@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Estimate the memory used to draw a figure, and reduce it"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import numpy
+import matplotlib.collections
+import matplotlib.image
+import matplotlib.lines
+import matplotlib.patches
+
+from .exceptions import PyfigError
+from . import backends, panels
+
+# bytes per vertex: the data, the transformed and clipped copies
+# in the renderer (and its serialisation for vector output)
+VERTEX_BYTES = 64
+# bytes of an artist without its vertices
+ARTIST_BYTES = 4096
+# artists with more vertices are rasterised in vector output
+DENSE = 10000
+# the lowest dpi for measuring the texts
+MIN_MEASURE_DPI = 40
+VECTOR_FORMATS = (".pdf", ".ps", ".eps", ".svg", ".svgz")
+
+
+def count_vertices(artist):
+    """The number of vertices which are drawn for artist"""
+    if isinstance(artist, matplotlib.lines.Line2D):
+        return len(artist.get_xydata())
+    if isinstance(artist, matplotlib.collections.Collection):
+        paths = artist.get_paths()
+        vertices = sum(len(path.vertices) for path in paths)
+        # a path which is drawn at every offset (markers)
+        if len(paths) == 1:
+            vertices *= max(1, len(artist.get_offsets()))
+        return vertices
+    if isinstance(artist, matplotlib.patches.Patch):
+        return len(artist.get_path().vertices)
+    return 0
+
+
+def get_pixels(ax, dpi):
+    """The (width, height) of ax in pixels at dpi"""
+    axpos = ax.get_position()
+    return (max(1, int(axpos.width * ax.figure.get_figwidth() * dpi)),
+            max(1, int(axpos.height * ax.figure.get_figheight() * dpi)))
+
+
+def estimate(fig, dpi, ext=None):
+    """The estimated memory (bytes) to draw fig at dpi (after the layout)
+       ext: the extension of the output (canvas size and vector output)"""
+
+    total = 0
+    vector = ext in VECTOR_FORMATS
+    if not vector:
+        height = fig.get_figheight() * dpi
+        if (fig.settings["tile_height"] > 0 and
+                ext in (".png", ".tif", ".tiff")):
+            height = min(height, fig.settings["tile_height"])
+        # the canvas buffer and the copy in the encoder
+        total += 2 * fig.get_figwidth() * dpi * height * 4
+
+    for ax in fig.get_new_axes():
+        for artist in panels.get_data_artists(ax):
+            total += ARTIST_BYTES
+            if isinstance(artist, matplotlib.image.AxesImage):
+                total += artist.get_array().size * 8
+            elif vector and artist.get_rasterized():
+                width, height = get_pixels(ax, dpi)
+                total += width * height * 4
+            else:
+                total += count_vertices(artist) * VERTEX_BYTES
+    return int(total)
+
+
+def estimate_measure(fig, measure_dpi):
+    """The estimated memory (bytes) of the canvas which measures the
+       texts at measure_dpi (none for the backends which only measure)"""
+    if fig.settings["backend"] in backends.MEASURED:
+        return 0
+    return int(fig.get_figwidth() * fig.get_figheight() * 4 *
+               measure_dpi ** 2)
+
+
+def decimate_line(line, nbins, horizontal=False):
+    """Keep only the minimum and maximum of each of nbins bins of line
+       (the shape at nbins pixels is unchanged), the data is restored by
+       restore
+       Returns whether the line is decimated"""
+
+    xdata = numpy.asarray(line.get_xdata())
+    ydata = numpy.asarray(line.get_ydata())
+    if len(xdata) <= 2 * nbins or line.get_marker() not in ("None", "",
+                                                            None):
+        return False
+    values = xdata if horizontal else ydata
+    edges = numpy.linspace(0, len(values), nbins + 1).astype(int)
+    bins = numpy.repeat(numpy.arange(nbins), numpy.diff(edges))
+    # sorted by value within each (contiguous) bin
+    order = numpy.lexsort((values, bins))
+    keep = numpy.unique(numpy.concatenate((
+        order[edges[:-1]], order[edges[1:] - 1], [0, len(values) - 1])))
+    if not hasattr(line, "undecimated"):
+        line.undecimated = line.get_data()
+    line.set_data(xdata[keep], ydata[keep])
+    return True
+
+
+def decimate(fig, dpi):
+    """Decimate the lines of fig to two points per pixel,
+       return the number of decimated lines"""
+    count = 0
+    for ax in fig.get_new_axes():
+        width, height = get_pixels(ax, dpi)
+        for line in ax.lines:
+            if decimate_line(line, height if ax.horizontal else width,
+                             ax.horizontal):
+                count += 1
+    return count
+
+
+def rasterise(fig):
+    """Rasterise the dense artists of fig (in vector output),
+       return the number of rasterised artists"""
+    count = 0
+    for ax in fig.get_new_axes():
+        for artist in panels.get_data_artists(ax):
+            if (not artist.get_rasterized() and
+                    count_vertices(artist) > DENSE):
+                artist.set_rasterized(True)
+                artist.budget_rasterised = True
+                count += 1
+    return count
+
+
+def restore(fig):
+    """Undo the decimation and rasterisation of check (after drawing)"""
+    for ax in fig.get_new_axes():
+        for line in ax.lines:
+            if hasattr(line, "undecimated"):
+                line.set_data(*line.undecimated)
+                del line.undecimated
+        for artist in panels.get_data_artists(ax):
+            if hasattr(artist, "budget_rasterised"):
+                artist.set_rasterized(False)
+                del artist.budget_rasterised
+
+
+def check_measure(fig):
+    """Lower the measure dpi (fig.measure_dpi) until the texts can be
+       measured within the memory_budget setting (before the layout)
+       Returns the actions taken"""
+
+    budget = fig.settings["memory_budget"] * 2 ** 20
+    actions = []
+    while (budget > 0 and fig.measure_dpi > MIN_MEASURE_DPI and
+           estimate_measure(fig, fig.measure_dpi) > budget):
+        fig.measure_dpi = max(MIN_MEASURE_DPI, fig.measure_dpi // 2)
+        actions.append("measure dpi {0}".format(fig.measure_dpi))
+    return actions
+
+
+def check(fig, dpi, ext=None):
+    """Reduce the memory to draw fig (after the layout) to the
+       memory_budget setting by decimating lines and rasterising dense
+       artists (vector output), until restore is called
+       Returns the estimate and the actions taken"""
+
+    budget = fig.settings["memory_budget"] * 2 ** 20
+    result = {"budget": int(budget), "actions": []}
+    result["estimate"] = estimate(fig, dpi, ext)
+    if budget <= 0 or result["estimate"] <= budget:
+        return result
+
+    count = decimate(fig, dpi)
+    if count > 0:
+        result["actions"].append("decimated {0} lines".format(count))
+        result["estimate"] = estimate(fig, dpi, ext)
+    if result["estimate"] > budget and ext in VECTOR_FORMATS:
+        count = rasterise(fig)
+        if count > 0:
+            result["actions"].append(
+                "rasterised {0} artists".format(count))
+            result["estimate"] = estimate(fig, dpi, ext)
+
+    if result["estimate"] > budget:
+        restore(fig)
+        raise PyfigError(
+            "Figure needs {0:.0f} MB, memory_budget is {1} MB ({2})".format(
+                result["estimate"] / 2 ** 20, fig.settings["memory_budget"],
+                ", ".join(result["actions"]) or "nothing to reduce"))
+    return result
@@ -0,0 +1,425 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The pyfig command: render figures from ini-files
+
+pyfig render renders the figures, pyfig build only renders the figures
+whose inputs changed (content hashes in a manifest) and can watch the
+inputs.
+
+A figure file contains the settings (see settings.spec) and the axes:
+
+    [settings]
+    title = Influenza
+    [axes]
+        [[ili]]
+        row = 0
+        col = 0
+        xlabel = week
+            [[[cases]]]
+            kind = plot
+            data = cases.csv
+            x = 0
+            y = 1
+            color = mix
+            label = cases
+"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import sys
+import time
+import traceback
+
+import configobj
+import numpy
+import six
+
+from .exceptions import PyfigError
+from .figure import Figure
+from . import config, fonts
+
+# plot commands which can be used as kind
+KINDS = ("plot", "fill", "bar", "errorbar")
+# keys of a plot section which are not passed to the plot command
+DATA_KEYS = ("kind", "data", "x", "y", "yerr", "header", "delimiter")
+# size of the blocks which are read to hash a file
+BLOCK_SIZE = 2 ** 20
+
+
+def parse_value(value):
+    """Convert a string (or list of strings) from the ini-file"""
+    if isinstance(value, list):
+        return [parse_value(elem) for elem in value]
+    if not isinstance(value, six.string_types):
+        return value
+    for convert in (int, float):
+        try:
+            return convert(value)
+        except ValueError:
+            pass
+    if value.lower() in ("true", "false"):
+        return value.lower() == "true"
+    return value
+
+
+def parse_rowcol(value):
+    """A row/col as int or (min, max) tuple"""
+    value = parse_value(value)
+    return tuple(value) if isinstance(value, list) else value
+
+
+def load_data(fname, header=0, delimiter=","):
+    """Load a 2d array from csv or npy (memory mapped)"""
+    if fname.endswith(".npy"):
+        data = numpy.load(fname, mmap_mode="r")
+    else:
+        data = numpy.genfromtxt(fname, delimiter=delimiter,
+                                skip_header=header)
+    return data.reshape(len(data), -1) if data.ndim == 1 else data
+
+
+class FigureJob(object):
+    """A figure to render, with its inputs and outputs"""
+    # (too few public methods) pylint: disable=R0903
+
+    def __init__(self, spec_fname, settings_fnames=(), formats=None,
+                 outdir=None):
+        self.spec_fname = spec_fname
+        self.spec = configobj.ConfigObj(spec_fname, file_error=True)
+        self.settings = configobj.ConfigObj()
+        for fname in settings_fnames:
+            self.settings.merge(configobj.ConfigObj(fname, file_error=True))
+        self.settings.merge(self.spec.get("settings", {}))
+        self.settings_fnames = list(settings_fnames)
+
+        base = os.path.splitext(os.path.basename(spec_fname))[0]
+        figname = self.settings.get("figname", base + ".png")
+        if outdir is not None:
+            figname = os.path.join(outdir, os.path.basename(figname))
+        if formats:
+            figname = os.path.splitext(figname)[0]
+            self.outputs = ["{0}.{1}".format(figname, fmt)
+                            for fmt in formats]
+        else:
+            self.outputs = [figname if os.path.splitext(figname)[1] else
+                            figname + ".png"]
+
+    def get_data_fnames(self):
+        """The data files used by the plots"""
+        dirname = os.path.dirname(self.spec_fname)
+        return [os.path.join(dirname, plot_spec["data"])
+                for ax_spec in self.spec.get("axes", {}).values()
+                for plot_spec in ax_spec.values()
+                if isinstance(plot_spec, dict) and "data" in plot_spec]
+
+    def get_inputs(self):
+        """All files the figure depends on"""
+        inputs = ([self.spec_fname] + self.settings_fnames +
+                  self.get_data_fnames())
+        if self.settings.get("logo", "") != "":
+            inputs.append(self.settings["logo"])
+        return inputs + self.get_font_fnames()
+
+    def get_font_fnames(self):
+        """The font files used by the figure"""
+        settings = config.load_settings(self.settings.dict(), check=True)
+        fnames, _missing = fonts.find_fonts(fonts.get_families(settings),
+                                            settings["rc"])
+        return sorted(set(fnames.values()))
+
+    def get_digest(self, known):
+        """The hash of the settings (including the color repos), the
+           outputs and the content of the inputs
+           known: the hashes of the files (see hash_file)"""
+        sha = hashlib.sha1()
+        sha.update(json.dumps({"settings": self.settings.dict(),
+                               "outputs": self.outputs},
+                              sort_keys=True).encode("utf-8"))
+        for fname in sorted(set(self.get_inputs())):
+            sha.update(fname.encode("utf-8"))
+            sha.update((hash_file(fname, known) if os.path.exists(fname)
+                        else "missing").encode("utf-8"))
+        return sha.hexdigest()
+
+    def is_uptodate(self):
+        """Whether all outputs are newer than the inputs"""
+        if not all(os.path.exists(fname) for fname in self.outputs):
+            return False
+        return (min(os.path.getmtime(fname) for fname in self.outputs) >=
+                max(os.path.getmtime(fname) for fname in self.get_inputs()
+                    if os.path.exists(fname)))
+
+    def render(self):
+        """Create the figure and save all outputs"""
+        fig = Figure(self.settings.dict(), check=True)
+        dirname = os.path.dirname(self.spec_fname)
+        for ax_spec in self.spec.get("axes", {}).values():
+            add_axes(fig, ax_spec, dirname)
+        fig.save(self.outputs[0])
+        for figname in self.outputs[1:]:
+            fig.savefig(figname)
+        fig.close()
+
+
+def hash_file(fname, known):
+    """The sha1 of the content of fname
+       known: {fname: [mtime, size, sha1]}, the hash is reused when the
+       mtime and size did not change (and added otherwise)"""
+    stat = os.stat(fname)
+    if known.get(fname, [None, None])[:2] == [stat.st_mtime, stat.st_size]:
+        return known[fname][2]
+    sha = hashlib.sha1()
+    with open(fname, "rb") as fobj:
+        for block in iter(lambda: fobj.read(BLOCK_SIZE), b""):
+            sha.update(block)
+    known[fname] = [stat.st_mtime, stat.st_size, sha.hexdigest()]
+    return known[fname][2]
+
+
+def add_axes(fig, ax_spec, dirname):
+    """Add an axes (and its plots) from the ini-section"""
+
+    ax = fig.add_ax(parse_rowcol(ax_spec.get("row", 0)),
+                    parse_rowcol(ax_spec.get("col", 0)))
+    for key in ("label", "topright"):
+        if key in ax_spec:
+            setattr(ax, key, ax_spec[key])
+    if "xstyle" in ax_spec:
+        ax.set_xstyle(ax_spec["xstyle"])
+
+    for name, plot_spec in ax_spec.items():
+        if not isinstance(plot_spec, dict):
+            continue
+        kind = plot_spec.get("kind", "plot")
+        if kind not in KINDS:
+            raise PyfigError("Unknown kind {0} for {1}".format(kind, name))
+        data = load_data(os.path.join(dirname, plot_spec["data"]),
+                         header=int(plot_spec.get("header", 0)),
+                         delimiter=plot_spec.get("delimiter", ","))
+        kwargs = dict((key, parse_value(value))
+                      for key, value in plot_spec.items()
+                      if key not in DATA_KEYS)
+        if "yerr" in plot_spec:
+            kwargs["yerr"] = data[:, int(plot_spec["yerr"])]
+        getattr(ax, kind)(data[:, int(plot_spec.get("x", 0))],
+                          data[:, int(plot_spec.get("y", 1))],
+                          **kwargs)
+
+    for key in ("xlabel", "ylabel"):
+        if key in ax_spec:
+            getattr(ax, "set_" + key)(ax_spec[key])
+    for key in ("xlim", "ylim"):
+        if key in ax_spec:
+            getattr(ax, "set_" + key)(*parse_value(ax_spec[key]))
+    return ax
+
+
+def run_job(args):
+    """Render a single figure (in a worker), return the summary
+       args: the arguments of FigureJob and incremental"""
+
+    incremental = args[-1]
+    result = {"figure": args[0], "outputs": [], "status": "ok",
+              "seconds": 0}
+    start = time.time()
+    try:
+        job = FigureJob(*args[:-1])
+        result["outputs"] = job.outputs
+        if incremental and job.is_uptodate():
+            result["status"] = "skipped"
+        else:
+            job.render()
+    except Exception:  # pylint: disable=W0703
+        result["status"] = "failed"
+        result["error"] = traceback.format_exc()
+    result["seconds"] = round(time.time() - start, 3)
+    return result
+
+
+def run_jobs(tasks, njobs=1):
+    """Render the tasks (see run_job) with njobs processes,
+       return the summaries"""
+    if njobs > 1 and len(tasks) > 1:
+        pool = multiprocessing.Pool(njobs)
+        try:
+            return pool.map(run_job, tasks, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    return [run_job(task) for task in tasks]
+
+
+def write_summary(results, fname, start):
+    """Write the summary as json (to stdout if fname is -)"""
+    summary = {
+        "seconds": round(time.time() - start, 3),
+        "rendered": sum(res["status"] == "ok" for res in results),
+        "skipped": sum(res["status"] == "skipped" for res in results),
+        "failed": sum(res["status"] == "failed" for res in results),
+        "figures": results}
+    if fname == "-":
+        json.dump(summary, sys.stdout, indent=2)
+        sys.stdout.write("\n")
+    else:
+        with open(fname, "w") as fobj:
+            json.dump(summary, fobj, indent=2)
+    return summary
+
+
+def load_manifest(fname):
+    """The manifest of a build: the hashes of the files and the digest
+       and outputs of the rendered figures"""
+    if not os.path.exists(fname):
+        return {"files": {}, "figures": {}}
+    with open(fname) as fobj:
+        return json.load(fobj)
+
+
+def write_manifest(manifest, fname):
+    """Write the manifest (replacing the old one at once)"""
+    with open(fname + ".tmp", "w") as fobj:
+        json.dump(manifest, fobj, indent=1, sort_keys=True)
+    if os.path.exists(fname) and not hasattr(os, "replace"):
+        os.remove(fname)
+    getattr(os, "replace", os.rename)(fname + ".tmp", fname)
+
+
+def build(args, formats, manifest):
+    """Render the figures whose inputs changed since the manifest,
+       update the manifest and return the summary"""
+
+    start = time.time()
+    results = []
+    tasks = []
+    digests = {}
+    for fname in args.figures:
+        try:
+            job = FigureJob(fname, args.settings, formats, args.outdir)
+            digest = job.get_digest(manifest["files"])
+        except Exception:  # pylint: disable=W0703
+            results.append({"figure": fname, "outputs": [],
+                            "status": "failed", "seconds": 0,
+                            "error": traceback.format_exc()})
+            continue
+        if (manifest["figures"].get(fname, {}).get("digest") == digest and
+                all(os.path.exists(output) for output in job.outputs)):
+            results.append({"figure": fname, "outputs": job.outputs,
+                            "status": "skipped", "seconds": 0})
+        else:
+            digests[fname] = digest
+            tasks.append((fname, args.settings, formats, args.outdir,
+                          False))
+
+    for result in run_jobs(tasks, args.jobs):
+        if result["status"] == "ok":
+            manifest["figures"][result["figure"]] = {
+                "digest": digests[result["figure"]],
+                "outputs": result["outputs"]}
+        else:
+            manifest["figures"].pop(result["figure"], None)
+        results.append(result)
+    write_manifest(manifest, args.manifest)
+    return write_summary(results, args.summary, start)
+
+
+def get_stats(fnames):
+    """The mtime and size of the files (None if missing)"""
+    stats = {}
+    for fname in fnames:
+        try:
+            stat = os.stat(fname)
+            stats[fname] = (stat.st_mtime, stat.st_size)
+        except OSError:
+            stats[fname] = None
+    return stats
+
+
+def watch(args, formats, manifest):
+    """Build, and build again when a figure or one of its inputs changes
+       (polling every args.interval seconds), until interrupted"""
+
+    summary = build(args, formats, manifest)
+    stats = get_stats(list(args.figures) + list(manifest["files"]))
+    try:
+        while True:
+            time.sleep(args.interval)
+            new_stats = get_stats(list(args.figures) +
+                                  list(manifest["files"]))
+            if new_stats != stats:
+                summary = build(args, formats, manifest)
+                stats = get_stats(list(args.figures) +
+                                  list(manifest["files"]))
+    except KeyboardInterrupt:
+        pass
+    return summary
+
+
+def add_job_arguments(parser):
+    """The arguments of the render and build commands"""
+    parser.add_argument("figures", nargs="+", help="figure ini-files")
+    parser.add_argument("--settings", action="append", default=[],
+                        help="settings file (used before the figure file)")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="number of worker processes")
+    parser.add_argument("--formats", default="",
+                        help="comma separated output formats (png,pdf)")
+    parser.add_argument("--outdir", default=None, help="output directory")
+    parser.add_argument("--summary", default="-",
+                        help="json summary file (- for stdout)")
+
+
+def get_parser():
+    """The parser of the command line arguments"""
+    parser = argparse.ArgumentParser(prog="pyfig")
+    commands = parser.add_subparsers(dest="command")
+    render = commands.add_parser("render", help="render figure files")
+    add_job_arguments(render)
+    render.add_argument("--incremental", action="store_true",
+                        help="skip figures newer than their inputs")
+    build_parser = commands.add_parser(
+        "build", help="render the figures whose inputs changed")
+    add_job_arguments(build_parser)
+    build_parser.add_argument("--manifest", default="pyfig-manifest.json",
+                              help="file with the hashes of the inputs")
+    build_parser.add_argument("--watch", action="store_true",
+                              help="build again when an input changes")
+    build_parser.add_argument("--interval", type=float, default=1.0,
+                              help="seconds between checks (watch)")
+    return parser
+
+
+def main(argv=None):
+    """Run the pyfig command"""
+    args = get_parser().parse_args(argv)
+    start = time.time()
+    if args.command not in ("render", "build"):
+        get_parser().print_help()
+        return 2
+
+    formats = [fmt.strip() for fmt in args.formats.split(",")
+               if fmt.strip()]
+    if args.command == "build":
+        manifest = load_manifest(args.manifest)
+        summary = (watch(args, formats, manifest) if args.watch else
+                   build(args, formats, manifest))
+        return 1 if summary["failed"] > 0 else 0
+
+    tasks = [(fname, args.settings, formats, args.outdir, args.incremental)
+             for fname in args.figures]
+    results = run_jobs(tasks, args.jobs)
+    summary = write_summary(results, args.summary, start)
+    return 1 if summary["failed"] > 0 else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -10,6 +10,33 @@ from __future__ import (division, absolute_import, unicode_literals,
                         print_function)
 
 import os
+import re
+import configobj
+from six import StringIO
+import six
+
+from .exceptions import PyfigError
+from . import tools
 
 ROOT = os.path.realpath(os.path.join(os.path.dirname(__file__), ".."))
 CONFIG_DIR = os.path.join(ROOT, "config")
+
+
+def load_settings(settings, check=False):
+    """Return the (validated) settings from a string, file or dict"""
+
+    if isinstance(settings, six.string_types):
+        settingsfile = StringIO()
+        settings = re.sub(r" *\\\n *", " ", settings)
+        settingsfile.write(settings)
+        settingsfile.seek(0)
+        settings = configobj.ConfigObj(
+            settingsfile,
+            configspec=os.path.join(CONFIG_DIR, "settings.spec"))
+        tools.cobj_check(settings, exception=PyfigError)
+    elif check:
+        settings = configobj.ConfigObj(
+            settings,
+            configspec=os.path.join(CONFIG_DIR, "settings.spec"))
+        tools.cobj_check(settings, exception=PyfigError)
+    return settings
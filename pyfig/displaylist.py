@@ -0,0 +1,240 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Record the calls which build a figure, to replay them elsewhere
+
+The display list is saved as npz: the arrays as numpy buffers and the
+calls as json (no pickles), e.g.
+
+    fig = pyfig.Figure(settings, record=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(x, y, label="cases")
+    data = fig.display.dumps()
+    # in another process
+    fig = pyfig.Figure.replay(data)
+    fig.save("cases.png")
+"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import contextlib
+import datetime
+import json
+import logging
+import numbers
+
+import numpy
+import six
+
+from .exceptions import PyfigError
+
+# attributes of the axes which are set directly (not via a method)
+SNAPSHOT = ("label", "topright", "loc", "ncol")
+# the fields of dates and datetimes
+DATE_FIELDS = ("year", "month", "day")
+DATETIME_FIELDS = DATE_FIELDS + ("hour", "minute", "second", "microsecond")
+logger = logging.getLogger(__name__)
+
+
+def encode(value, arrays):
+    """Convert value to json, arrays are appended (by reference)"""
+    if isinstance(value, numpy.ndarray) and value.dtype.kind == "O":
+        # object arrays (e.g. datetimes) cannot be saved without pickle
+        return {"objects": encode(value.tolist(), arrays)}
+    if isinstance(value, numpy.ndarray):
+        arrays.append(value)
+        return {"array": len(arrays) - 1}
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, datetime.datetime) and value.tzinfo is None:
+        return {"datetime": [getattr(value, field)
+                             for field in DATETIME_FIELDS]}
+    if isinstance(value, datetime.date) and not isinstance(
+            value, datetime.datetime):
+        return {"date": [getattr(value, field) for field in DATE_FIELDS]}
+    if value is None or isinstance(value, (bool, numbers.Number) +
+                                   six.string_types):
+        return value
+    if isinstance(value, list):
+        return [encode(elem, arrays) for elem in value]
+    if isinstance(value, tuple):
+        return {"tuple": [encode(elem, arrays) for elem in value]}
+    if isinstance(value, dict):
+        return {"dict": [[encode(key, arrays), encode(val, arrays)]
+                         for key, val in value.items()]}
+    if hasattr(value, "dict") and hasattr(value, "merge"):
+        # configobj sections
+        return encode(value.dict(), arrays)
+    raise PyfigError("Cannot record {0} ({1})".format(
+        repr(value)[:40], type(value).__name__))
+
+
+def decode(value, arrays):
+    """Convert json (see encode) back to the values"""
+    if isinstance(value, list):
+        return [decode(elem, arrays) for elem in value]
+    if isinstance(value, dict):
+        if "array" in value:
+            return arrays[value["array"]]
+        if "objects" in value:
+            return numpy.array(decode(value["objects"], arrays),
+                               dtype=object)
+        if "datetime" in value:
+            return datetime.datetime(*value["datetime"])
+        if "date" in value:
+            return datetime.date(*value["date"])
+        if "tuple" in value:
+            return tuple(decode(elem, arrays) for elem in value["tuple"])
+        return dict((decode(key, arrays), decode(val, arrays))
+                    for key, val in value["dict"])
+    return value
+
+
+class DisplayList(object):
+    """The calls on a figure and its axes"""
+
+    def __init__(self, settings=None):
+        self.arrays = []
+        self.settings = encode(settings, self.arrays)
+        self.calls = []
+        self.axes = []
+        self.states = []
+        self.active = True
+        self.busy = False
+        # the calls which could not be recorded
+        self.errors = []
+
+    def add_ax(self, ax, args, kwargs, ax1=None):
+        """Record the creation of ax by Figure.add_ax, or by
+           Figure.add_ax2 (as twin of ax1)"""
+        if not self.active:
+            return
+        self._snapshot()
+        self.calls.append({"ax": None if ax1 is None else self.index(ax1),
+                           "method": "add_ax" if ax1 is None else "add_ax2",
+                           "args": encode(list(args), self.arrays),
+                           "kwargs": encode(kwargs, self.arrays)})
+        self.axes.append(ax)
+        self.states.append(dict((attr, getattr(ax, attr, None))
+                                for attr in SNAPSHOT))
+
+    def _snapshot(self):
+        """Record the changed attributes of the axes"""
+        for index, ax in enumerate(self.axes):
+            for attr in SNAPSHOT:
+                value = getattr(ax, attr, None)
+                if value != self.states[index][attr]:
+                    self.calls.append({
+                        "ax": index, "method": "setattr",
+                        "args": encode([attr, value], self.arrays),
+                        "kwargs": {"dict": []}})
+                    self.states[index][attr] = value
+
+    def index(self, ax):
+        """The index of ax in the recorded axes"""
+        for index, other in enumerate(self.axes):
+            if ax is other:
+                return index
+        raise PyfigError("Axes not created with add_ax/add_ax2, "
+                         "its calls cannot be recorded")
+
+    @contextlib.contextmanager
+    def paused(self):
+        """Do not record the calls made inside the block"""
+        busy = self.busy
+        self.busy = True
+        try:
+            yield
+        finally:
+            self.busy = busy
+
+    @contextlib.contextmanager
+    def call(self, ax, method, args, kwargs):
+        """Record the call, unless it is made by another recorded call
+           (or the figure is already drawn)"""
+        if not self.active or self.busy:
+            yield
+            return
+        index = self.index(ax)
+        self._snapshot()
+        narrays = len(self.arrays)
+        try:
+            self.calls.append({"ax": index, "method": method,
+                               "args": encode(list(args), self.arrays),
+                               "kwargs": encode(kwargs, self.arrays)})
+        except PyfigError as err:
+            # the figure is drawn, but the display list cannot be saved
+            del self.arrays[narrays:]
+            logger.warning("%s not recorded: %s", method, err)
+            self.errors.append("{0}: {1}".format(method, err))
+        self.busy = True
+        try:
+            yield
+        finally:
+            self.busy = False
+
+    def stop(self):
+        """Stop recording (the figure is being drawn)"""
+        if self.active:
+            self._snapshot()
+        self.active = False
+
+    def save(self, fobj):
+        """Save as npz to fobj (a filename or file object)"""
+        if self.errors:
+            raise PyfigError("Display list incomplete, not recorded: " +
+                             "; ".join(self.errors))
+        if self.active:
+            self._snapshot()
+        header = json.dumps({"settings": self.settings,
+                             "calls": self.calls}).encode("utf-8")
+        arrays = dict(("a{0}".format(index), array)
+                      for index, array in enumerate(self.arrays))
+        arrays["display"] = numpy.frombuffer(header, dtype=numpy.uint8)
+        numpy.savez(fobj, **arrays)
+
+    def dumps(self):
+        """The display list as bytes (see save)"""
+        output = six.BytesIO()
+        self.save(output)
+        return output.getvalue()
+
+    def get_settings(self):
+        """The settings of the recorded figure"""
+        return decode(self.settings, self.arrays)
+
+    def replay(self, fig):
+        """Replay the calls on (a fresh) fig, return fig"""
+        axes = []
+        for call in self.calls:
+            args = decode(call["args"], self.arrays)
+            kwargs = decode(call["kwargs"], self.arrays)
+            if call["method"] == "add_ax":
+                axes.append(fig.add_ax(*args, **kwargs))
+            elif call["method"] == "add_ax2":
+                axes.append(fig.add_ax2(axes[call["ax"]], *args, **kwargs))
+            elif call["method"] == "setattr":
+                setattr(axes[call["ax"]], *args)
+            else:
+                getattr(axes[call["ax"]], call["method"])(*args, **kwargs)
+        return fig
+
+
+def load(source):
+    """Load a display list from a filename, file object or bytes"""
+    if isinstance(source, bytes):
+        source = six.BytesIO(source)
+    with numpy.load(source, allow_pickle=False) as data:
+        header = json.loads(data["display"].tobytes().decode("utf-8"))
+        arrays = [data["a{0}".format(index)]
+                  for index in range(len(data.files) - 1)]
+    display = DisplayList()
+    display.arrays = arrays
+    display.settings = header["settings"]
+    display.calls = header["calls"]
+    display.active = False
+    return display
@@ -16,38 +16,29 @@ import collections
 import re
 import copy
 import datetime
-import configobj
+import gzip
+import time
+from multiprocessing.pool import ThreadPool
+import numpy
 import matplotlib.figure
-from matplotlib.backends.backend_agg import FigureCanvasAgg as canvas
-from six import StringIO
+import matplotlib.transforms
 import six
 
 from .ax import Axes
 from .exceptions import PyfigError
-from . import config, tools
+from . import (assets, backends, budget, config, displaylist, panels, raster,
+               svgtools, tex, ticker, tools)
 
 
 class Figure(matplotlib.figure.Figure):
     """The Figure class"""
     # (too many public) pylint: disable=R0904
 
-    def __init__(self, settings=None, setup=True, check=False):
-        if isinstance(settings, six.string_types):
-            settingsfile = StringIO()
-            settings = re.sub(r" *\\\n *", " ", settings)
-            settingsfile.write(settings)
-            settingsfile.seek(0)
-            self.settings = configobj.ConfigObj(
-                settingsfile,
-                configspec=os.path.join(config.CONFIG_DIR, "settings.spec"))
-            tools.cobj_check(self.settings, exception=PyfigError)
-        elif check:
-            self.settings = configobj.ConfigObj(
-                settings,
-                configspec=os.path.join(config.CONFIG_DIR, "settings.spec"))
-            tools.cobj_check(self.settings, exception=PyfigError)
-        else:
-            self.settings = settings
+    def __init__(self, settings=None, setup=True, check=False,
+                 record=False):
+        # the calls which build the figure (see displaylist.py)
+        self.display = displaylist.DisplayList(settings) if record else None
+        self.settings = config.load_settings(settings, check)
 
         self.rows = []
         self.cols = []
@@ -57,6 +48,14 @@ class Figure(matplotlib.figure.Figure):
         self.labels = collections.defaultdict(list)
         self.style = collections.defaultdict(
             lambda: collections.defaultdict(dict))
+        self.tick_cache = {}
+        # the dpi at which the texts are measured, when the backend
+        # draws them (see _temp_save)
+        self.measure_dpi = 80
+        # whether the legend, labels etc. are added (see _prepare)
+        self.prepared = False
+        # the actions taken to measure within the memory_budget setting
+        self.budget_actions = []
 
         if setup:
             matplotlib.figure.Figure.__init__(
@@ -66,7 +65,7 @@ class Figure(matplotlib.figure.Figure):
     def setup(self):
         """Set up the figure"""
 
-        canvas(self)
+        backends.get_canvas(self.settings["backend"])(self)
         self.width = self.get_figwidth() * self.get_dpi()
         self.height = self.get_figheight() * self.get_dpi()
         self._set_locale()
@@ -89,6 +88,41 @@ class Figure(matplotlib.figure.Figure):
             self.settings["cols"] = [col / sum(self.settings["cols"])
                                      for col in self.settings["cols"]]
 
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Break the references between figure, axes and legends,
+           and release the canvas buffers"""
+
+        for legend in self.legends:
+            for attr in ("lines", "labels"):
+                legend.__dict__.pop(attr, None)
+        axes = list(self.get_new_axes())
+        for ax in axes:
+            for attr in ("labels", "abc_label",
+                         "single_xlabel", "single_ylabel"):
+                ax.__dict__.pop(attr, None)
+            ax.parent = None
+
+        self.plotlines.clear()
+        self.labels.clear()
+        self.style.clear()
+        self.repo.clear()
+        self.tick_cache.clear()
+        self.title = None
+        self.clf()
+        for ax in axes:
+            ax.fig = None
+
+        # a new canvas, such that the renderer (and its buffer) is freed
+        if hasattr(self, "_cachedRenderer"):
+            self._cachedRenderer = None
+        backends.get_canvas(self.settings["backend"])(self)
+
     def get_row_col(self, row, col):
         """Return row and col
            Raises warning if not available as row"""
@@ -98,12 +132,13 @@ class Figure(matplotlib.figure.Figure):
         if isinstance(row, int) and row > 100:
             row = (row // 10) % 10, (row // 1) % 10
 
+        nrows, ncols = len(self.settings["rows"]), len(self.settings["cols"])
         for row_no in [row] if isinstance(row, int) else row:
-            if row_no not in range(len(self.settings["rows"])):
+            if not 0 <= row_no < nrows:
                 raise PyfigError("row {row} added, {rows} available".format(
                     row=row, rows=len(self.settings["rows"])))
         for col_no in [col] if isinstance(col, int) else col:
-            if col_no not in range(len(self.settings["cols"])):
+            if not 0 <= col_no < ncols:
                 raise PyfigError("col {col} added, {cols} available".format(
                     col=col, cols=len(self.settings["cols"])))
 
@@ -114,10 +149,29 @@ class Figure(matplotlib.figure.Figure):
 
         ax = Axes(self, row=row, col=col, *args, **kwargs)
         self.add_axes(ax)
+        if self.display is not None:
+            self.display.add_ax(ax, (row, col) + args, kwargs)
         return ax
 
+    @classmethod
+    def replay(cls, source):
+        """Create a figure from a display list (see displaylist.py)
+           source: a DisplayList, or a npz filename, file object or bytes"""
+        display = (source if isinstance(source, displaylist.DisplayList)
+                   else displaylist.load(source))
+        return display.replay(cls(display.get_settings(), check=True))
+
     def add_ax2(self, ax1, no_axes=2, left=True):
         """Add a second ax"""
+        if self.display is not None:
+            with self.display.paused():
+                ax2 = self._add_ax2(ax1, no_axes, left)
+            self.display.add_ax(ax2, (no_axes, left), {}, ax1)
+            return ax2
+        return self._add_ax2(ax1, no_axes, left)
+
+    def _add_ax2(self, ax1, no_axes, left):
+        """Add a second ax (see add_ax2)"""
         ax2 = (Axes(self, ax1=ax1, frameon=False, sharex=ax1)
                if no_axes == 2 else
                Axes(self, ax1=ax1, frameon=False))
@@ -156,8 +210,151 @@ class Figure(matplotlib.figure.Figure):
             ax.set_position(ax.get_axpos())
 
     def save(self, figname=None, **kwargs):
-        """Save the figure"""
+        """Save the figure
+           figname can be a list of (dpi, figname) targets, with the dpi
+           as number or as scale of the dpi setting ("2x", "0.25x")
+           Returns the figname, dpi, the estimated memory and the actions
+           taken to stay within the memory_budget setting"""
 
+        if figname is None:
+            figname = self.settings["figname"]
+        if isinstance(figname, list):
+            return self._save_targets(figname, **kwargs)
+        dpi = kwargs.get("dpi") or self.settings["dpi"]
+        if "format" in kwargs:
+            ext = "." + kwargs["format"]
+        elif isinstance(figname, six.string_types):
+            ext = os.path.splitext(figname)[1].lower()
+        else:
+            ext = None
+        self._prepare()
+        result = budget.check(self, dpi, ext)
+        try:
+            self.savefig(figname, **kwargs)
+        finally:
+            budget.restore(self)
+        result["actions"][:0] = self.budget_actions
+        result.update({"figname": figname, "dpi": dpi})
+        return result
+
+    def _get_target_dpi(self, dpi):
+        """The dpi of a target, a number or a scale ("2x")"""
+        if isinstance(dpi, six.string_types):
+            if not dpi.endswith("x"):
+                raise PyfigError("Unknown target dpi {0}".format(dpi))
+            return float(dpi[:-1]) * self.settings["dpi"]
+        return dpi
+
+    def _save_targets(self, targets, **kwargs):
+        """Save the figure at several resolutions (see save)
+           The layout is computed once. The png/webp/tiff targets are
+           rendered once at the highest dpi and downscaled, or rendered
+           again from the same layout (whichever is faster), and encoded
+           in parallel"""
+
+        targets = sorted([(self._get_target_dpi(dpi), figname)
+                          for dpi, figname in targets],
+                         key=lambda target: -target[0])
+        rasters = [(dpi, figname) for dpi, figname in targets
+                   if self._is_raster_target(figname)]
+        self._prepare()
+        result = budget.check(self, targets[0][0],
+                              os.path.splitext(targets[0][1])[1].lower())
+        try:
+            # the canvas of the largest raster target (if not the top target)
+            if rasters and rasters[0] != targets[0]:
+                check = budget.check(
+                    self, rasters[0][0],
+                    os.path.splitext(rasters[0][1])[1].lower())
+                result["actions"].extend(check["actions"])
+                result["estimate"] = max(result["estimate"],
+                                         check["estimate"])
+            result["targets"] = self._render_targets(targets, **kwargs)
+        finally:
+            budget.restore(self)
+        result["actions"][:0] = self.budget_actions
+        return result
+
+    def _render_targets(self, targets, **kwargs):
+        """Save the targets (see _save_targets), return how each target
+           is made"""
+        if "transparent" not in kwargs:
+            kwargs.setdefault("facecolor", self.settings["facecolor"])
+
+        made = []
+        images = []
+        # the image of each dpi
+        rendered = {}
+        source = None
+        for dpi, figname in targets:
+            if not self._is_raster_target(figname):
+                self.savefig(figname, dpi=dpi, **kwargs)
+                method = "savefig"
+            elif dpi in rendered:
+                method = "copy"
+            else:
+                start = time.time()
+                rendered[dpi], method = self._render_target(dpi, source,
+                                                            **kwargs)
+                if source is None:
+                    source = (rendered[dpi], dpi, time.time() - start)
+            if method != "savefig":
+                images.append((figname, rendered[dpi], dpi))
+            made.append({"figname": figname, "dpi": dpi, "method": method})
+
+        pool = ThreadPool(max(1, len(images)))
+        try:
+            pool.map(lambda image: self._write_rgba(*image), images)
+        finally:
+            pool.close()
+            pool.join()
+        return made
+
+    def _is_raster_target(self, figname):
+        """Whether the target is rendered to an image by _render_target
+           (not by savefig)"""
+        return (os.path.splitext(figname)[1].lower() in
+                (".png", ".webp", ".tif", ".tiff") and
+                self.settings["tile_height"] <= 0)
+
+    def _render_target(self, dpi, source, **kwargs):
+        """Return the image at dpi and how it is made
+           source: the (image, dpi, render seconds) of the first raster
+           target, None if not yet rendered
+           The image is scaled from source or rendered again, whichever
+           is expected to be faster"""
+        width = int(round(self.get_figwidth() * dpi))
+        height = int(round(self.get_figheight() * dpi))
+        if source is not None:
+            rgba, top, seconds = source
+            pixels = rgba.shape[0] * rgba.shape[1]
+            # the render time of the target, in proportion to its pixels
+            render = seconds * width * height / pixels
+            factor = int(round(top / dpi))
+            if (abs(top / dpi - factor) < 1e-6 and
+                    rgba.shape[0] // factor == height and
+                    rgba.shape[1] // factor == width):
+                if pixels / raster.DOWNSCALE_RATE < render:
+                    return raster.downscale(rgba, factor), "downscale"
+            elif pixels / raster.RESIZE_RATE < render:
+                resized = raster.resize(rgba, width, height)
+                if resized is not None:
+                    return resized, "resize"
+        if self.settings["panel_jobs"] > 1:
+            return (panels.render_rgba(self, dpi, self.settings["panel_jobs"],
+                                       **kwargs), "render")
+        return self.render_rgba(dpi, **kwargs), "render"
+
+    def _prepare(self):
+        """Add the legend, labels etc. and compute the layout
+           (once, a figure is not laid out again when it is saved again)"""
+
+        if self.prepared:
+            return
+        self.prepared = True
+        if self.display is not None:
+            self.display.stop()
+        self.budget_actions = budget.check_measure(self)
         self._save_extras()
         if self.settings["title"] != "":
             self.title = self.text(
@@ -174,6 +371,10 @@ class Figure(matplotlib.figure.Figure):
                 )
 
         self._save_legend()
+        if matplotlib.rcParams["text.usetex"]:
+            tex.prime_cache(self, [self.settings["dpi"]] if
+                            self.settings["backend"] in backends.MEASURED else
+                            [self.measure_dpi, self.settings["dpi"]])
         self._temp_save()
 
         self._update_margins()
@@ -196,7 +397,7 @@ class Figure(matplotlib.figure.Figure):
                 family="Arial", style="italic")
 
         if self.settings["logo"] != "":
-            img = matplotlib.image.imread(self.settings["logo"])
+            img = assets.load_image(self.settings["logo"])
             inset = img.shape[1] / self.width + 0.01
             self.figimage(img, 1, 1)
         else:
@@ -221,7 +422,138 @@ class Figure(matplotlib.figure.Figure):
         self._temp_save()
         self._check_ticks()
 
-        self.savefig(figname, **kwargs)
+    def layout(self):
+        """Compute the layout without saving, return the positions
+           (as figure fractions, origin bottom left) of the axes,
+           legends and labels
+           The figure can still be saved afterwards, with this layout"""
+
+        self._prepare()
+        result = {
+            "width": self.get_figwidth() * self.settings["dpi"],
+            "height": self.get_figheight() * self.settings["dpi"],
+            "dpi": self.settings["dpi"],
+            "axes": [],
+            "legends": [],
+            "texts": [self._text_layout(text) for text in self.texts
+                      if text.get_visible() and text.get_text() != ""]}
+
+        for ax in self.get_new_axes():
+            labels = [ax.xaxis.get_label(), ax.yaxis.get_label()]
+            labels += getattr(ax, "labels", [])
+            if hasattr(ax, "abc_label"):
+                labels.append(ax.abc_label)
+            result["axes"].append({
+                "row": ax.row,
+                "col": ax.col,
+                "position": [float(val) for val in ax.get_position().bounds],
+                "horizontal": ax.horizontal,
+                "xlim": [float(val) for val in ax.get_xlim()],
+                "ylim": [float(val) for val in ax.get_ylim()],
+                "xticks": [float(val) for val in ax.get_xticks()],
+                "yticks": [float(val) for val in ax.get_yticks()],
+                "labels": [self._text_layout(label) for label in labels
+                           if label.get_visible() and
+                           label.get_text() != ""]})
+
+        for legend in self.legends:
+            if hasattr(legend, "deleted"):
+                continue
+            result["legends"].append({
+                "bbox": self._fig_bounds(legend.get_window_extent()),
+                "ncol": legend.ncol if hasattr(legend, "ncol") else 1,
+                "labels": [text.get_text() for text in legend.get_texts()]})
+        return result
+
+    def _fig_bounds(self, bbox):
+        """The (x, y, width, height) of a display bbox in figure fractions"""
+        return [float(val) for val in
+                bbox.transformed(self.transFigure.inverted()).bounds]
+
+    def _text_layout(self, text):
+        """The position and properties of a text"""
+        return {"text": text.get_text(),
+                "bbox": self._fig_bounds(text.get_window_extent()),
+                "fontsize": float(text.get_size()),
+                "rotation": float(text.get_rotation()),
+                "ha": text.get_horizontalalignment(),
+                "va": text.get_verticalalignment()}
+
+    def save_frames(self, update, frames, figname=None, dpi=None,
+                    output=None):
+        """Save a sequence of frames which share the layout
+           update(frame) changes the data and returns the changed artists
+           (an artist returned once is redrawn in all later frames)
+           figname: pattern for the png files, e.g. "week{0:03d}.png"
+           output: file object (e.g. an encoder pipe) for raw rgba frames
+           Returns the filenames of the frames"""
+        # (too many arguments) pylint: disable=R0913
+
+        if figname is None:
+            base, ext = os.path.splitext(self.settings["figname"])
+            figname = base + "_{0:04d}" + (ext if ext != "" else ".png")
+        if output is None and figname.format(0) == figname.format(1):
+            raise PyfigError(
+                "Frame pattern {0} has no {{}} for the frame number".format(
+                    figname))
+        if dpi is None:
+            dpi = self.settings["dpi"]
+        if not hasattr(self.canvas, "copy_from_bbox"):
+            raise PyfigError("Frames require a canvas with blitting (agg)")
+
+        frames = iter(frames)
+        try:
+            frame = next(frames)
+        except StopIteration:
+            return []
+        artists = update(frame)
+
+        # layout once, with the data of the first frame
+        self._prepare()
+        orig_dpi, orig_facecolor = self.get_dpi(), self.patch.get_facecolor()
+        self.set_dpi(dpi)
+        self.patch.set_facecolor(self.settings["facecolor"])
+        animated = []
+        background = None
+
+        fignames = []
+        try:
+            while True:
+                new = [artist for artist in artists if artist not in animated]
+                if background is None or len(new) > 0:
+                    # the background without any of the animated artists
+                    for artist in new:
+                        artist.set_animated(True)
+                        animated.append(artist)
+                    animated.sort(key=lambda artist: artist.get_zorder())
+                    self.canvas.draw()
+                    background = self.canvas.copy_from_bbox(self.bbox)
+                else:
+                    self.canvas.restore_region(background)
+                for artist in animated:
+                    self.draw_artist(artist)
+                rgba = numpy.asarray(self.canvas.buffer_rgba())
+                if output is not None:
+                    output.write(rgba.tobytes())
+                else:
+                    fignames.append(figname.format(len(fignames)))
+                    tools.create_dir(fignames[-1])
+                    with open(fignames[-1], "wb") as fobj:
+                        raster.write_png(
+                            fobj, rgba,
+                            max_colors=self.settings["png_palette"], dpi=dpi,
+                            **(self._png_options() or {"level": 6}))
+                try:
+                    frame = next(frames)
+                except StopIteration:
+                    break
+                artists = update(frame)
+        finally:
+            for artist in animated:
+                artist.set_animated(False)
+            self.set_dpi(orig_dpi)
+            self.patch.set_facecolor(orig_facecolor)
+        return fignames
 
     def _fit_axlabels(self):
         """Update ymargins such that ax.labels fit"""
@@ -343,20 +675,158 @@ class Figure(matplotlib.figure.Figure):
 
         if dpi is None:
             dpi = self.settings["dpi"]
-        tools.create_dir(figname)
-        if "transparent" in kwargs:
+        if isinstance(figname, six.string_types):
+            tools.create_dir(figname)
+        if "transparent" not in kwargs:
+            kwargs.setdefault("facecolor", self.settings["facecolor"])
+        ext = (os.path.splitext(figname)[1].lower()
+               if (isinstance(figname, six.string_types) and
+                   "format" not in kwargs) else
+               None)
+        if (self.settings["tile_height"] > 0 and
+                ext in (".png", ".tif", ".tiff")):
+            self._savefig_tiled(figname, dpi, **kwargs)
+        elif (ext == ".webp" or
+              ext == ".png" and (self._png_options() or
+                                 self.settings["panel_jobs"] > 1)):
+            self._savefig_encoded(figname, dpi, **kwargs)
+        elif ext in (".svg", ".svgz"):
+            self._savefig_svg(figname, dpi, **kwargs)
+        else:
+            if (self.settings["backend"] == "cairo" and
+                    (ext or "." + kwargs.get("format", "png"))[1:] in
+                    backends.CAIRO_FORMATS):
+                kwargs.setdefault("backend", "cairo")
             matplotlib.figure.Figure.savefig(
                 self, figname, dpi=dpi, **kwargs)
-        else:
+
+    def _png_options(self):
+        """The options for the pyfig png encoder
+           (empty when matplotlib's encoder should be used)"""
+        if (self.settings["png_compression"] < 0 and
+                self.settings["png_filter"] == "none" and
+                self.settings["png_strategy"] == "default" and
+                self.settings["png_palette"] == 0):
+            return {}
+        return {"level": max(self.settings["png_compression"], 0) if
+                         self.settings["png_compression"] >= 0 else 6,
+                "png_filter": self.settings["png_filter"],
+                "strategy": self.settings["png_strategy"]}
+
+    def render_rgba(self, dpi, **kwargs):
+        """Render the figure, return an (height, width, 4) uint8 array"""
+        output = six.BytesIO()
+        if self.settings["backend"] == "cairo":
+            kwargs.setdefault("backend", "cairo")
+        matplotlib.figure.Figure.savefig(
+            self, output, format="rgba", dpi=dpi, **kwargs)
+        rgba = numpy.frombuffer(output.getvalue(), dtype=numpy.uint8)
+        fig_w, fig_h = self.get_figwidth() * dpi, self.get_figheight() * dpi
+        # the canvas size is truncated, allow for rounding errors
+        for width in (int(fig_w), int(round(fig_w))):
+            for height in (int(fig_h), int(round(fig_h))):
+                if width * height * 4 == len(rgba):
+                    return rgba.reshape(height, width, 4)
+        raise PyfigError("Cannot determine the size of the rendered figure")
+
+    def _savefig_svg(self, figname, dpi, **kwargs):
+        """Save a (compressed) svg with rounded coordinates
+           Markers, hatches and glyphs (svg_fonttype=path) are written
+           once in <defs> by matplotlib and referenced with <use>"""
+
+        output = six.BytesIO()
+        with matplotlib.rc_context(
+                {"svg.fonttype": self.settings["svg_fonttype"]} if
+                self.settings["svg_fonttype"] != "" else {}):
             matplotlib.figure.Figure.savefig(
-                self, figname, facecolor=self.settings["facecolor"],
-                dpi=dpi, **kwargs)
+                self, output, format="svg", dpi=dpi, **kwargs)
+        svg = output.getvalue()
+        if self.settings["svg_precision"] >= 0:
+            svg = svgtools.round_coords(svg, self.settings["svg_precision"])
+        if figname.lower().endswith(".svgz"):
+            with gzip.GzipFile(figname, "wb", mtime=0) as fobj:
+                fobj.write(svg)
+        else:
+            with open(figname, "wb") as fobj:
+                fobj.write(svg)
+
+    def _savefig_encoded(self, figname, dpi, **kwargs):
+        """Save png/webp with the encoder options from the settings"""
+        rgba = (panels.render_rgba(self, dpi, self.settings["panel_jobs"],
+                                   **kwargs)
+                if self.settings["panel_jobs"] > 1 else
+                self.render_rgba(dpi, **kwargs))
+        self._write_rgba(figname, rgba, dpi)
+
+    def _write_rgba(self, figname, rgba, dpi=None):
+        """Encode the image as png, webp or tiff (by extension)
+           dpi: the resolution in the png and tiff metadata"""
+        tools.create_dir(figname)
+        ext = os.path.splitext(figname)[1].lower()
+        with open(figname, "wb") as fobj:
+            if ext == ".webp":
+                raster.write_webp(fobj, rgba,
+                                  quality=self.settings["webp_quality"],
+                                  lossless=self.settings["webp_lossless"])
+            elif ext == ".png":
+                raster.write_png(fobj, rgba,
+                                 max_colors=self.settings["png_palette"],
+                                 dpi=dpi,
+                                 **(self._png_options() or {"level": 6}))
+            else:
+                writer = raster.get_writer(fobj, ext, rgba.shape[1],
+                                           rgba.shape[0], dpi=dpi)
+                writer.write(rgba)
+                writer.close()
+
+    def _savefig_tiled(self, figname, dpi, **kwargs):
+        """Render the figure in horizontal bands, which are written
+           one by one (memory is bounded by the band size)"""
+
+        width = int(round(self.get_figwidth() * dpi))
+        height = int(round(self.get_figheight() * dpi))
+        tile_height = self.settings["tile_height"]
+        # small extra such that rounding does not lose a pixel
+        extra = 1e-6
+        # the figure legends are anchored to the (cropped) figure bbox
+        for legend in self.legends:
+            legend.set_bbox_to_anchor(
+                matplotlib.transforms.Bbox.unit(), self.transFigure)
+
+        with open(figname, "wb") as fobj:
+            ext = os.path.splitext(figname)[1].lower()
+            writer = raster.get_writer(
+                fobj, ext, width, height, dpi=dpi,
+                **(self._png_options() if ext == ".png" else {}))
+            for top in range(0, height, tile_height):
+                rows = min(tile_height, height - top)
+                bbox = matplotlib.transforms.Bbox.from_extents(
+                    0, (height - top - rows) / dpi,
+                    width / dpi + extra, (height - top) / dpi + extra)
+                output = six.BytesIO()
+                matplotlib.figure.Figure.savefig(
+                    self, output, format="rgba", dpi=dpi,
+                    bbox_inches=bbox, **kwargs)
+                band = numpy.frombuffer(output.getvalue(), dtype=numpy.uint8)
+                writer.write(band.reshape(-1, width, 4)[:rows])
+            writer.close()
+        for legend in self.legends:
+            legend.set_bbox_to_anchor(None)
 
     def _temp_save(self):
-        """Save a temporary figure"""
-        figname = "/tmp/{0}.png".format(os.getpid())
-        self.savefig(figname, dpi=80)
-        os.remove(figname)
+        """Draw the figure to measure the texts
+           Agg and the vector backends only measure, nothing is drawn, at
+           the dpi of the figure. Other backends draw at the (low) measure
+           dpi"""
+        if self.settings["backend"] in backends.MEASURED:
+            self.draw(self.canvas.get_renderer() if
+                      self.settings["backend"] in backends.VECTOR else
+                      backends.MeasureRenderer("agg", self))
+        else:
+            matplotlib.figure.Figure.savefig(
+                self, six.BytesIO(), format="rgba", dpi=self.measure_dpi,
+                facecolor=self.settings["facecolor"],
+                backend=self.settings["backend"])
 
     def _set_locale(self):
         """Set the language of the plot"""
@@ -466,36 +936,34 @@ class Figure(matplotlib.figure.Figure):
 
         for ax in self.get_new_axes():
             pos = ax.get_window_extent()
-            labels = [label for label in ax.get_xticklabels() +
-                      ax.get_yticklabels() +
-                      [ax.yaxis.get_label(), ax.xaxis.get_label()] +
-                      ax.texts
-                      if label.get_visible() and
-                      label.get_text() != ""]
-
-            if len(labels) == 0:
+            # measure each label only once
+            boxes = [label.get_window_extent()
+                     for label in ax.get_xticklabels() +
+                     ax.get_yticklabels() +
+                     [ax.yaxis.get_label(), ax.xaxis.get_label()] +
+                     ax.texts
+                     if label.get_visible() and
+                     label.get_text() != ""]
+
+            if len(boxes) == 0:
                 continue
 
-            ymin = min([label.get_window_extent().ymin
-                        for label in labels])
+            ymin = min([box.ymin for box in boxes])
             self.rows[ax.max_row + 1][0] = max(
                 self.rows[ax.max_row + 1][0],
                 pos.ymin - ymin)
 
-            xmin = min([label.get_window_extent().xmin
-                        for label in labels]) - 2
+            xmin = min([box.xmin for box in boxes]) - 2
             self.cols[ax.min_col][2] = max(
                 self.cols[ax.min_col][2],
                 pos.xmin - xmin)
 
-            xmax = max([label.get_window_extent().xmax
-                        for label in labels])
+            xmax = max([box.xmax for box in boxes])
             self.cols[ax.max_col + 1][0] = max(
                 self.cols[ax.max_col + 1][0],
                 xmax - pos.xmax)
 
-            ymax = max([label.get_window_extent().ymax
-                        for label in labels])
+            ymax = max([box.ymax for box in boxes])
             self.rows[ax.min_row][2] = max(
                 self.rows[ax.min_row][2],
                 ymax - pos.ymax)
@@ -567,82 +1035,83 @@ class Figure(matplotlib.figure.Figure):
 
     def _bottom_labels(self, xticks):
         """Set the bottom label to be empty when not the last"""
-        labels = collections.defaultdict(list)
-        for ax in self.get_new_axes():
+        axes = [(ax, ax.xaxis.get_label().get_text())
+                for ax in self.get_new_axes()]
+        max_rows = {}
+        for ax, xlabel in axes:
             for col in range(ax.min_col, ax.max_col + 1):
-                xlabel = ax.xaxis.get_label().get_text()
-                labels[(xlabel, col)].append(ax.max_row)
+                max_rows[(xlabel, col)] = max(
+                    max_rows.get((xlabel, col), ax.max_row), ax.max_row)
 
-        for ax in self.get_new_axes():
-            xlabel = ax.xaxis.get_label().get_text()
-            for col in range(ax.min_col, ax.max_col + 1):
-                if ax.max_row < max(labels[(xlabel, col)]):
-                    ax.xaxis.set_label_text("")
-                    if xticks:
-                        ax.xaxis.set_ticklabels([""] *
-                                                len(ax.xaxis.get_ticklocs()))
+        for ax, xlabel in axes:
+            if any(ax.max_row < max_rows[(xlabel, col)]
+                   for col in range(ax.min_col, ax.max_col + 1)):
+                ax.xaxis.set_label_text("")
+                if xticks:
+                    ax.xaxis.set_ticklabels([""] *
+                                            len(ax.xaxis.get_ticklocs()))
 
     def _single_xlabel(self):
         """A single xlabel for axes with same label next to eachother"""
 
-        labels = collections.defaultdict(list)
-        for ax in self.get_new_axes():
-            xlabel = ax.xaxis.get_label().get_text()
-            for col in range(ax.min_col, ax.max_col + 1):
-                labels[(xlabel, ax.max_row)].append(col)
+        axes = [(ax, ax.xaxis.get_label().get_text())
+                for ax in self.get_new_axes()]
+        counts = collections.Counter()
+        for ax, xlabel in axes:
+            counts[(xlabel, ax.max_row)] += ax.max_col + 1 - ax.min_col
 
-        for ax in self.get_new_axes():
-            xlabel = ax.xaxis.get_label().get_text()
-            if (xlabel, ax.max_row) not in labels:
+        for ax, xlabel in axes:
+            if (xlabel, ax.max_row) not in counts:
                 ax.xaxis.set_label_text("")
-            elif len(labels[(xlabel, ax.max_row)]) != 1:
+            elif counts[(xlabel, ax.max_row)] != 1:
                 ax.xaxis.set_label_text(xlabel[0:10])
                 ax.single_xlabel = xlabel
-                del labels[(xlabel, ax.max_row)]
+                del counts[(xlabel, ax.max_row)]
 
     def _left_labels(self, yticks):
         """Set the bottom label to be empty when not the last"""
-        labels = collections.defaultdict(list)
-        for ax in self.get_new_axes():
-            for row in range(ax.min_row, ax.max_row + 1):
-                pos = ax.yaxis.get_label_position()
-                labels[(ax.get_ylabel(), row, pos)].append(ax.max_col)
-
-        for ax in self.get_new_axes():
-            ylabel = ax.get_ylabel()
-            pos = ax.yaxis.get_label_position()
+        axes = [(ax, ax.get_ylabel(), ax.yaxis.get_label_position())
+                for ax in self.get_new_axes()]
+        min_cols, max_cols = {}, {}
+        for ax, ylabel, pos in axes:
             for row in range(ax.min_row, ax.max_row + 1):
-                if (pos == "right" and
-                        ax.max_col < max(labels[(ylabel, row, pos)])):
-                    ax.set_ylabel("")
-                    if yticks:
-                        ax.set_yticklabels([""] * len(ax.get_yticks()))
-                elif (pos == "left" and
-                      ax.min_col > min(labels[(ylabel, row, pos)])):
-                    ax.yaxis.set_label_text("")
-                    if yticks:
-                        ax.yaxis.set_ticklabels(
-                            [""] * len(ax.yaxis.get_ticklocs()))
+                key = (ylabel, row, pos)
+                max_cols[key] = max(max_cols.get(key, ax.max_col), ax.max_col)
+                min_cols[key] = min(min_cols.get(key, ax.max_col), ax.max_col)
+
+        for ax, ylabel, pos in axes:
+            rows = range(ax.min_row, ax.max_row + 1)
+            if (pos == "right" and
+                    any(ax.max_col < max_cols[(ylabel, row, pos)]
+                        for row in rows)):
+                ax.set_ylabel("")
+                if yticks:
+                    ax.set_yticklabels([""] * len(ax.get_yticks()))
+            elif (pos == "left" and
+                  any(ax.min_col > min_cols[(ylabel, row, pos)]
+                      for row in rows)):
+                ax.yaxis.set_label_text("")
+                if yticks:
+                    ax.yaxis.set_ticklabels(
+                        [""] * len(ax.yaxis.get_ticklocs()))
 
     def _single_ylabel(self):
         """A single xlabel for axes with same label next to eachother"""
 
-        labels = collections.defaultdict(list)
-        for ax in self.get_new_axes():
-            pos = ax.yaxis.get_label_position()
-            ylabel = ax.yaxis.get_label().get_text()
-            for row in range(ax.min_row, ax.max_row + 1):
-                labels[(ylabel, ax.min_col, pos)].append(row)
+        axes = [(ax, ax.yaxis.get_label().get_text(),
+                 ax.yaxis.get_label_position())
+                for ax in self.get_new_axes()]
+        counts = collections.Counter()
+        for ax, ylabel, pos in axes:
+            counts[(ylabel, ax.min_col, pos)] += ax.max_row + 1 - ax.min_row
 
-        for ax in self.get_new_axes():
-            pos = ax.yaxis.get_label_position()
-            ylabel = ax.yaxis.get_label().get_text()
-            if (ylabel, ax.min_col, pos) not in labels:
+        for ax, ylabel, pos in axes:
+            if (ylabel, ax.min_col, pos) not in counts:
                 ax.yaxis.set_label_text("")
-            elif len(labels[(ylabel, ax.min_col, pos)]) != 1:
+            elif counts[(ylabel, ax.min_col, pos)] != 1:
                 ax.yaxis.set_label_text(ylabel[0:10])
                 ax.single_ylabel = ylabel
-                del labels[(ylabel, ax.min_col, pos)]
+                del counts[(ylabel, ax.min_col, pos)]
 
     def ax_labels(self):
         """Put axes titles"""
@@ -676,7 +1145,8 @@ class Figure(matplotlib.figure.Figure):
         prev_row, prev_col = None, None
         label = "A"
 
-        for ax in sorted(list(self.get_new_axes())):
+        for ax in sorted(self.get_new_axes(), key=Axes.sort_key,
+                         reverse=self.settings["abc_reverse"]):
             if not ax.axison:
                 continue
             if ax.yaxis.get_label_position() == "right":
@@ -703,17 +1173,22 @@ class Figure(matplotlib.figure.Figure):
     def _set_ticksize(self):
         """reduce ticklabel size"""
         for ax in self.get_new_axes():
-            if ax.horizontal or len(ax.get_yticks()) == 0:
+            if ax.horizontal:
+                continue
+            yticks = ax.get_yticks()
+            if len(yticks) == 0:
                 continue
 
-            if max(ax.get_yticks()) > 10000:
-                # ax.tick_params(axis="y", labelsize=6)
-                for tick in ax.yaxis.get_major_ticks():
-                    tick.label.set_fontsize(tick.label.get_fontsize() - 2)
-            elif max(ax.get_yticks()) > 1000:
-                # ax.tick_params(axis="y", labelsize=7)
-                for tick in ax.yaxis.get_major_ticks():
-                    tick.label.set_fontsize(tick.label.get_fontsize() - 1)
+            if max(yticks) > 10000:
+                reduce_size = 2
+            elif max(yticks) > 1000:
+                reduce_size = 1
+            else:
+                continue
+            # set the size for all (current and future) ticks at once
+            fontsize = ax.yaxis.get_major_ticks()[0].label1.get_fontsize()
+            ax.tick_params(axis="y", which="major",
+                           labelsize=fontsize - reduce_size)
 
     def _save_extras(self):
         """Some extra things to do before saving"""
@@ -731,6 +1206,8 @@ class Figure(matplotlib.figure.Figure):
             self._single_ylabel()
         if self.settings["ax_labels"]:
             self.ax_labels()
+        for ax in self.get_new_axes():
+            ticker.share_ticks(ax, self.tick_cache)
         self._set_ticksize()
 
     def _check_ticks(self):
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Resolve and load the fonts before the first figure is drawn"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import matplotlib.font_manager
+import six
+
+from . import assets, config
+
+# families hard-coded in Figure.save (date and url)
+EXTRA_FAMILIES = ["Arial"]
+# style/weight combinations used by pyfig texts (labels, title, abc)
+VARIANTS = [("normal", "normal"), ("italic", "normal"), ("normal", "bold")]
+logger = logging.getLogger(__name__)
+
+
+def get_families(settings):
+    """The font families which are used by figures with settings
+       (generic families are resolved by find_fonts)"""
+
+    families = settings["rc"].get("font.family", [])
+    if isinstance(families, six.string_types):
+        families = families.split(",")
+    result = []
+    for family in [family.strip() for family in families] + EXTRA_FAMILIES:
+        if family != "" and family not in result:
+            result.append(family)
+    return result
+
+
+def find_fonts(families, rc=None):
+    """Return a dict with the font file which matplotlib picks for each
+       (family, style, weight) with the rc settings, and a list with the
+       families which have no match"""
+
+    fnames = {}
+    missing = []
+    with matplotlib.rc_context(rc):
+        for family in families:
+            for style, weight in VARIANTS:
+                try:
+                    fnames[(family, style, weight)] = (
+                        matplotlib.font_manager.findfont(
+                            matplotlib.font_manager.FontProperties(
+                                family=family, style=style, weight=weight),
+                            fallback_to_default=False))
+                except ValueError:
+                    missing.append(family)
+                    break
+    return fnames, missing
+
+
+def warmup(settings=None, check=False):
+    """Resolve and load all fonts (and the logo) used by the settings
+       Return the font families which are not available"""
+
+    settings = config.load_settings(
+        "" if settings is None else settings, check)
+    fnames, missing = find_fonts(get_families(settings), settings["rc"])
+    for fname in set(fnames.values()):
+        if hasattr(matplotlib.font_manager, "get_font"):
+            # cached FT2Font objects, reused when drawing
+            matplotlib.font_manager.get_font(fname)
+    for family in missing:
+        logger.warning("Font family %s not available", family)
+
+    assets.preload_assets(settings["logo"])
+    return missing
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Render the data of each axes in a separate (forked) process"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import multiprocessing
+
+import numpy
+
+# extra pixels around the axes, for the antialiasing at the clip edges
+MARGIN = 2
+# the figure which is rendered, shared with the forked workers
+FIGURE = {}
+
+
+def get_data_artists(ax):
+    """The visible data artists of ax"""
+    return [artist for artist in (list(ax.lines) + list(ax.patches) +
+                                  list(ax.collections) + list(ax.images))
+            if artist.get_visible()]
+
+
+def get_rect(ax, dpi, shape):
+    """The (row, col) slices of ax in an image with shape at dpi"""
+    bbox = ax.get_window_extent()
+    scale = dpi / ax.figure.get_dpi()
+    height, width = shape[:2]
+    xmin = max(0, int(numpy.floor(bbox.xmin * scale)) - MARGIN)
+    xmax = min(width, int(numpy.ceil(bbox.xmax * scale)) + MARGIN)
+    ymin = max(0, height - int(numpy.ceil(bbox.ymax * scale)) - MARGIN)
+    ymax = min(height, height - int(numpy.floor(bbox.ymin * scale)) + MARGIN)
+    return slice(ymin, ymax), slice(xmin, xmax)
+
+
+def render_panel(index):
+    """Render the figure with only the axes (and data) which overlap
+       with axes index, return the pixels of that axes"""
+    fig, dpi, kwargs = FIGURE["fig"], FIGURE["dpi"], FIGURE["kwargs"]
+    axes = FIGURE["axes"]
+    # a worker can render several panels, set the visibility of all
+    # (twin axes and close neighbours draw in the same pixels)
+    for other, artists in enumerate(FIGURE["artists"]):
+        visible = FIGURE["overlaps"][index][other]
+        axes[other].set_visible(visible)
+        for artist in artists:
+            artist.set_visible(visible)
+    rgba = fig.render_rgba(dpi, **kwargs)
+    rect = get_rect(axes[index], dpi, rgba.shape)
+    return index, rgba[rect].copy()
+
+
+def get_overlaps(axes, dpi):
+    """For each axes, which axes (including labels) overlap with its
+       rect (see get_rect) at dpi
+       The other axes do not have to be drawn for its pixels"""
+    fig = axes[0].figure
+    renderer = (fig.canvas.get_renderer()
+                if hasattr(fig.canvas, "get_renderer") else
+                None)
+    extents = [ax.get_tightbbox(renderer) for ax in axes]
+    rects = [ax.get_window_extent().padded((MARGIN + 1) * fig.dpi / dpi)
+             for ax in axes]
+    return [[rect.overlaps(extent) for extent in extents] for rect in rects]
+
+
+def render_rgba(fig, dpi, jobs, **kwargs):
+    """Render fig, with the data of the axes rendered in parallel
+       The pixels of each axes come from a full render of the figure,
+       so the result is identical to fig.render_rgba"""
+
+    axes = [ax for ax in fig.get_new_axes() if ax.get_visible()]
+    if len(axes) == 0:
+        return fig.render_rgba(dpi, **kwargs)
+    # data which is not clipped to its axes is drawn by the parent
+    artists = [[artist for artist in get_data_artists(ax)
+                if artist.get_clip_on()]
+               for ax in axes]
+    try:
+        context = (multiprocessing.get_context("fork")
+                   if hasattr(multiprocessing, "get_context") else
+                   multiprocessing)
+    except ValueError:
+        # no fork available (windows)
+        return fig.render_rgba(dpi, **kwargs)
+
+    FIGURE.update(fig=fig, dpi=dpi, kwargs=kwargs, axes=axes,
+                  artists=artists, overlaps=get_overlaps(axes, dpi))
+    pool = context.Pool(jobs)
+    try:
+        panels = pool.map_async(render_panel, range(len(axes)))
+        # the parent renders everything except the data
+        for ax_artists in artists:
+            for artist in ax_artists:
+                artist.set_visible(False)
+        try:
+            rgba = fig.render_rgba(dpi, **kwargs).copy()
+        finally:
+            for ax_artists in artists:
+                for artist in ax_artists:
+                    artist.set_visible(True)
+        for index, panel in panels.get():
+            rgba[get_rect(axes[index], dpi, rgba.shape)] = panel
+    finally:
+        pool.close()
+        pool.join()
+        FIGURE.clear()
+    return rgba
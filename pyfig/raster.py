@@ -0,0 +1,297 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Write RGBA images (PNG, TIFF) band by band"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import struct
+import zlib
+
+import numpy
+
+from .exceptions import PyfigError
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+PNG_FILTERS = {"none": 0, "sub": 1, "up": 2, "paeth": 4}
+ZLIB_STRATEGIES = {
+    "default": zlib.Z_DEFAULT_STRATEGY,
+    "filtered": zlib.Z_FILTERED,
+    "huffman": zlib.Z_HUFFMAN_ONLY,
+    "rle": getattr(zlib, "Z_RLE", 3)}
+# meters per inch (the png resolution is in pixels per meter)
+INCH = 0.0254
+# source pixels per second of downscale and resize (to choose between
+# scaling an image and rendering it again)
+DOWNSCALE_RATE = 6e6
+RESIZE_RATE = 25e6
+
+
+class PngWriter(object):
+    """Write a png, one band of rows at a time
+       level: zlib compression level
+       png_filter: row filter (none, sub, up, paeth)
+       strategy: zlib strategy (default, filtered, huffman, rle)
+       palette: (ncolors, 4) rgba array, the bands are then indices
+       dpi: the resolution (pHYs chunk), None to leave it out"""
+
+    def __init__(self, fobj, width, height, level=6, png_filter="none",
+                 strategy="default", palette=None, dpi=None):
+        # (too many arguments) pylint: disable=R0913
+        self.fobj = fobj
+        self.width = width
+        self.height = height
+        self.rows = 0
+        self.filter = PNG_FILTERS[png_filter]
+        self.channels = 1 if palette is not None else 4
+        self.prev_row = numpy.zeros(width * self.channels, dtype=numpy.uint8)
+        self.compressor = zlib.compressobj(
+            level, zlib.DEFLATED, zlib.MAX_WBITS, zlib.DEF_MEM_LEVEL,
+            ZLIB_STRATEGIES[strategy])
+        self.fobj.write(PNG_SIGNATURE)
+        self._chunk(b"IHDR", struct.pack(
+            ">IIBBBBB", width, height, 8,
+            3 if palette is not None else 6, 0, 0, 0))
+        if dpi is not None:
+            self._chunk(b"pHYs", struct.pack(
+                ">IIB", int(round(dpi / INCH)), int(round(dpi / INCH)), 1))
+        if palette is not None:
+            palette = numpy.asarray(palette, dtype=numpy.uint8)
+            self._chunk(b"PLTE", palette[:, :3].tobytes())
+            if (palette[:, 3] != 255).any():
+                self._chunk(b"tRNS", palette[:, 3].tobytes())
+
+    def _chunk(self, tag, data):
+        """Write a png chunk"""
+        self.fobj.write(struct.pack(">I", len(data)))
+        self.fobj.write(tag)
+        self.fobj.write(data)
+        self.fobj.write(struct.pack(
+            ">I", zlib.crc32(tag + data) & 0xffffffff))
+
+    def _filter(self, rows):
+        """Apply the row filter to rows (nrows, nbytes) of uint8"""
+
+        if self.filter == 0:
+            return rows
+        left = numpy.zeros_like(rows)
+        left[:, self.channels:] = rows[:, :-self.channels]
+        up = numpy.vstack((self.prev_row[numpy.newaxis], rows[:-1]))
+        if self.filter == 1:
+            return rows - left
+        elif self.filter == 2:
+            return rows - up
+        upleft = numpy.zeros_like(rows)
+        upleft[:, self.channels:] = up[:, :-self.channels]
+        # paeth predictor
+        left, up, upleft = (left.astype(numpy.int16), up.astype(numpy.int16),
+                            upleft.astype(numpy.int16))
+        base = left + up - upleft
+        dist_left = numpy.abs(base - left)
+        dist_up = numpy.abs(base - up)
+        dist_upleft = numpy.abs(base - upleft)
+        predictor = numpy.where(
+            (dist_left <= dist_up) & (dist_left <= dist_upleft), left,
+            numpy.where(dist_up <= dist_upleft, up, upleft))
+        return rows - predictor.astype(numpy.uint8)
+
+    def write(self, band):
+        """Write an uint8 array with shape (rows, width, 4)
+           or (rows, width) with palette indices"""
+        if band.shape[1] != self.width or band[0].size != (
+                self.width * self.channels):
+            raise PyfigError("Band {0} does not fit width {1}".format(
+                band.shape, self.width))
+        if band.shape[0] == 0:
+            return
+        rows = numpy.ascontiguousarray(band, dtype=numpy.uint8).reshape(
+            band.shape[0], -1)
+        # each row starts with the filter type
+        data = numpy.empty((rows.shape[0], rows.shape[1] + 1),
+                           dtype=numpy.uint8)
+        data[:, 0] = self.filter
+        data[:, 1:] = self._filter(rows)
+        self.prev_row = rows[-1].copy()
+        self.rows += band.shape[0]
+        compressed = self.compressor.compress(data.tobytes())
+        if compressed:
+            self._chunk(b"IDAT", compressed)
+
+    def close(self):
+        """Finish the image"""
+        if self.rows != self.height:
+            raise PyfigError("Png with {0} rows, expected {1}".format(
+                self.rows, self.height))
+        self._chunk(b"IDAT", self.compressor.flush())
+        self._chunk(b"IEND", b"")
+
+
+def get_palette(rgba, max_colors):
+    """Return (palette, indices) if the image has at most max_colors
+       colors, otherwise (None, rgba)"""
+
+    packed = numpy.ascontiguousarray(rgba).view(numpy.uint32)[..., 0]
+    colors, indices = numpy.unique(packed, return_inverse=True)
+    if len(colors) > max_colors:
+        return None, rgba
+    palette = colors.view(numpy.uint8).reshape(-1, 4)
+    return palette, indices.reshape(packed.shape).astype(numpy.uint8)
+
+
+def write_png(fobj, rgba, level=6, png_filter="none", strategy="default",
+              max_colors=0, dpi=None):
+    """Write the (height, width, 4) image as png, with a palette
+       when it has at most max_colors colors"""
+    # (too many arguments) pylint: disable=R0913
+
+    palette, data = (get_palette(rgba, max_colors) if max_colors > 0 else
+                     (None, rgba))
+    writer = PngWriter(fobj, rgba.shape[1], rgba.shape[0], level=level,
+                       png_filter=png_filter, strategy=strategy,
+                       palette=palette, dpi=dpi)
+    writer.write(data)
+    writer.close()
+
+
+def write_webp(fobj, rgba, quality=80, lossless=False):
+    """Write the (height, width, 4) image as webp (requires Pillow)"""
+    try:
+        import PIL.Image  # pylint: disable=F0401
+    except ImportError:
+        raise PyfigError("Pillow is required for webp output")
+    PIL.Image.fromarray(numpy.ascontiguousarray(rgba), "RGBA").save(
+        fobj, format="WEBP", quality=quality, lossless=lossless)
+
+
+def downscale(rgba, factor):
+    """Reduce the image by an integer factor (mean of factor x factor
+       blocks, with premultiplied alpha)"""
+
+    height, width = rgba.shape[0] // factor, rgba.shape[1] // factor
+    blocks = rgba[:height * factor, :width * factor].astype(numpy.uint32)
+    alpha = blocks[..., 3:]
+    opaque = bool((alpha == 255).all())
+    if not opaque:
+        blocks[..., :3] *= alpha
+    blocks = blocks.reshape(height, factor, width, factor, 4).sum(axis=(1, 3))
+    if opaque:
+        return ((blocks + factor ** 2 // 2) // factor ** 2).astype(
+            numpy.uint8)
+    alpha = blocks[..., 3:]
+    blocks[..., :3] = numpy.where(
+        alpha > 0, (blocks[..., :3] + alpha // 2) // numpy.maximum(alpha, 1),
+        0)
+    blocks[..., 3:] = (alpha + factor ** 2 // 2) // factor ** 2
+    return blocks.astype(numpy.uint8)
+
+
+def resize(rgba, width, height):
+    """Resize the image with a lanczos filter (requires Pillow),
+       return None without Pillow"""
+    try:
+        import PIL.Image  # pylint: disable=F0401
+    except ImportError:
+        return None
+    image = PIL.Image.fromarray(numpy.ascontiguousarray(rgba), "RGBA")
+    return numpy.asarray(image.resize((width, height), PIL.Image.LANCZOS))
+
+
+class TiffWriter(object):
+    """Write an uncompressed RGBA tiff, one strip per band
+       fobj should be seekable
+       dpi: the resolution, None to leave it out"""
+
+    def __init__(self, fobj, width, height, dpi=None):
+        self.fobj = fobj
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.rows_per_strip = None
+        self.offsets = []
+        self.counts = []
+        # little endian header, the IFD offset is written at the end
+        self.fobj.write(b"II*\x00\x00\x00\x00\x00")
+
+    def write(self, band):
+        """Write an uint8 array with shape (rows, width, 4)"""
+        if band.shape[1:] != (self.width, 4):
+            raise PyfigError("Band {0} does not fit width {1}".format(
+                band.shape, self.width))
+        if self.rows_per_strip is None:
+            self.rows_per_strip = band.shape[0]
+        elif (sum(self.counts) // (self.width * 4) % self.rows_per_strip or
+              band.shape[0] > self.rows_per_strip):
+            raise PyfigError("Only the last tiff strip can be smaller")
+        self.offsets.append(self.fobj.tell())
+        data = numpy.ascontiguousarray(band, dtype=numpy.uint8).tobytes()
+        self.counts.append(len(data))
+        self.fobj.write(data)
+
+    def _array(self, fmt, values):
+        """Write values (word aligned), return the offset"""
+        if self.fobj.tell() % 2:
+            self.fobj.write(b"\x00")
+        offset = self.fobj.tell()
+        self.fobj.write(struct.pack("<{0}{1}".format(len(values), fmt),
+                                    *values))
+        return offset
+
+    def close(self):
+        """Write the image file directory"""
+        if sum(self.counts) != self.width * self.height * 4:
+            raise PyfigError("Tiff incomplete")
+        bits = self._array("H", [8, 8, 8, 8])
+        offsets = (self._array("I", self.offsets)
+                   if len(self.offsets) > 1 else self.offsets[0])
+        counts = (self._array("I", self.counts)
+                  if len(self.counts) > 1 else self.counts[0])
+        # (tag, type (3: short, 4: long, 5: rational), count, value)
+        entries = [
+            (256, 4, 1, self.width),
+            (257, 4, 1, self.height),
+            (258, 3, 4, bits),
+            (259, 3, 1, 1),
+            (262, 3, 1, 2),
+            (273, 4, len(self.offsets), offsets),
+            (277, 3, 1, 4),
+            (278, 4, 1, self.rows_per_strip),
+            (279, 4, len(self.counts), counts),
+            (284, 3, 1, 1),
+            (338, 3, 1, 2)]
+        if self.dpi is not None:
+            # pixels per inch (unit 2)
+            resolution = [int(round(self.dpi * 1000)), 1000]
+            entries += [(282, 5, 1, self._array("I", resolution)),
+                        (283, 5, 1, self._array("I", resolution)),
+                        (296, 3, 1, 2)]
+            # the entries are sorted by tag
+            entries.sort()
+        if self.fobj.tell() % 2:
+            self.fobj.write(b"\x00")
+        ifd = self.fobj.tell()
+        self.fobj.write(struct.pack("<H", len(entries)))
+        for tag, typ, count, value in entries:
+            if typ == 3 and count == 1:
+                self.fobj.write(struct.pack("<HHIHH", tag, typ, count,
+                                            value, 0))
+            else:
+                self.fobj.write(struct.pack("<HHII", tag, typ, count,
+                                            value))
+        self.fobj.write(struct.pack("<I", 0))
+        self.fobj.seek(4)
+        self.fobj.write(struct.pack("<I", ifd))
+        self.fobj.seek(0, 2)
+
+
+def get_writer(fobj, ext, width, height, dpi=None, **kwargs):
+    """Return the writer for the file extension
+       kwargs are png options"""
+    if ext == ".png":
+        return PngWriter(fobj, width, height, dpi=dpi, **kwargs)
+    elif ext in (".tif", ".tiff"):
+        return TiffWriter(fobj, width, height, dpi=dpi)
+    raise PyfigError("No band writer for {0}".format(ext))
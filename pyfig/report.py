@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Multi-page pdf report, written one figure at a time"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+from matplotlib.backends.backend_pdf import PdfPages
+
+from . import tools
+
+
+class Report(object):
+    """A pdf with a page for each figure
+       Each page is written when the figure is added, and the fonts are
+       embedded once (for all pages) when the report is closed"""
+
+    def __init__(self, fname):
+        tools.create_dir(fname)
+        self.fname = fname
+        self.pages = PdfPages(fname)
+        self.npages = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add(self, fig, close=True):
+        """Lay out fig, write it as the next page and release it"""
+        fig.save(self.pages, format="pdf")
+        self.npages += 1
+        if close:
+            fig.close()
+
+    def close(self):
+        """Write the fonts and finish the pdf"""
+        if self.pages is not None:
+            self.pages.close()
+            self.pages = None
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Reduce data which does not fit in memory to per-pixel bins"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import itertools
+
+import numpy
+import six
+
+from .exceptions import PyfigError
+from . import tools
+
+
+def iter_chunks(source, chunksize=100000):
+    """Yield (x, y) arrays from source
+       source: csv/npy file (two columns), a function which returns
+       an iterable of chunks, or an iterable of chunks. A chunk is
+       an (n, 2) array or a (x, y) tuple"""
+
+    if isinstance(source, six.string_types) and source.endswith(".npy"):
+        data = numpy.load(source, mmap_mode="r")
+        chunks = (data[start:start + chunksize]
+                  for start in range(0, len(data), chunksize))
+    elif isinstance(source, six.string_types):
+        chunks = _iter_csv(source, chunksize)
+    elif callable(source):
+        chunks = source()
+    else:
+        chunks = source
+
+    for chunk in chunks:
+        if isinstance(chunk, tuple) and len(chunk) == 2:
+            xvals, yvals = (tools.as_array(chunk[0], numeric=True),
+                            tools.as_array(chunk[1], numeric=True))
+        else:
+            chunk = tools.as_array(chunk, numeric=True)
+            xvals, yvals = chunk[:, 0], chunk[:, 1]
+        finite = numpy.isfinite(xvals) & numpy.isfinite(yvals)
+        yield xvals[finite], yvals[finite]
+
+
+def _iter_csv(fname, chunksize):
+    """Yield (n, 2) arrays from a csv file"""
+    with open(fname) as fobj:
+        while True:
+            lines = list(itertools.islice(fobj, chunksize))
+            if len(lines) == 0:
+                break
+            yield numpy.loadtxt(lines, delimiter=",", ndmin=2)
+
+
+def get_extent(source, chunksize=100000):
+    """The minimum and maximum x (first pass over the data)"""
+    xmin, xmax = numpy.inf, -numpy.inf
+    for xvals, _yvals in iter_chunks(source, chunksize):
+        if len(xvals) > 0:
+            xmin, xmax = min(xmin, xvals.min()), max(xmax, xvals.max())
+    if xmin > xmax:
+        raise PyfigError("No data in stream")
+    return xmin, xmax
+
+
+def bin_stream(source, xmin, xmax, nbins, chunksize=100000):
+    """Return the center, min, max and mean of y for nbins bins
+       between xmin and xmax (bins without data are left out)"""
+
+    mins = numpy.full(nbins, numpy.inf)
+    maxs = numpy.full(nbins, -numpy.inf)
+    sums = numpy.zeros(nbins)
+    counts = numpy.zeros(nbins)
+    scale = nbins / (xmax - xmin) if xmax > xmin else 0
+
+    for xvals, yvals in iter_chunks(source, chunksize):
+        inside = (xvals >= xmin) & (xvals <= xmax)
+        xvals, yvals = xvals[inside], yvals[inside]
+        index = numpy.minimum(((xvals - xmin) * scale).astype(int),
+                              nbins - 1)
+        numpy.minimum.at(mins, index, yvals)
+        numpy.maximum.at(maxs, index, yvals)
+        sums += numpy.bincount(index, weights=yvals, minlength=nbins)
+        counts += numpy.bincount(index, minlength=nbins)
+
+    filled = counts > 0
+    centers = xmin + (numpy.arange(nbins) + 0.5) * (xmax - xmin) / nbins
+    return (centers[filled], mins[filled], maxs[filled],
+            sums[filled] / counts[filled])
+
+
+def get_edges(size, nbins):
+    """Edges which divide size elements in (at most) nbins bins"""
+    return numpy.unique(numpy.linspace(0, size, min(size, nbins) + 1)
+                        .astype(int))
+
+
+def reduce_matrix(data, shape, how="mean", max_elements=2 ** 24):
+    """Reduce the 2d data (array or memmap) to at most shape (rows, cols)
+       how: mean or max. The rows are read in bands of at most
+       max_elements elements"""
+
+    if how not in ("mean", "max"):
+        raise PyfigError("Unknown reduction {0}".format(how))
+    data = tools.as_array(data)
+    row_edges = get_edges(data.shape[0], shape[0])
+    col_edges = get_edges(data.shape[1], shape[1])
+    ufunc = numpy.add if how == "mean" else numpy.maximum
+    counts = numpy.outer(numpy.diff(row_edges), numpy.diff(col_edges))
+
+    result = numpy.empty((len(row_edges) - 1, len(col_edges) - 1))
+    # number of output rows per band
+    step = max(1, max_elements //
+               max(1, data.shape[1] * int(numpy.diff(row_edges).max())))
+    for start in range(0, len(row_edges) - 1, step):
+        stop = min(start + step, len(row_edges) - 1)
+        band = numpy.asarray(data[row_edges[start]:row_edges[stop]],
+                             dtype=numpy.float64)
+        band = ufunc.reduceat(band, col_edges[:-1], axis=1)
+        result[start:stop] = ufunc.reduceat(
+            band, row_edges[start:stop] - row_edges[start], axis=0)
+    if how == "mean":
+        result /= counts
+    return result
+
+
+def get_percentiles(data, percentiles, max_elements=2 ** 24):
+    """The percentiles of each column of the 2d data (members x time),
+       returns a (len(percentiles), time) array
+       Memmaps are read in blocks of columns of at most max_elements
+       elements (the percentiles are exact)"""
+
+    data = tools.as_array(data)
+    result = numpy.empty((len(percentiles), data.shape[1]))
+    step = max(1, max_elements // max(1, data.shape[0]))
+    for start in range(0, data.shape[1], step):
+        block = numpy.asarray(data[:, start:start + step],
+                              dtype=numpy.float64)
+        result[:, start:start + step] = numpy.nanpercentile(
+            block, percentiles, axis=0)
+    return result
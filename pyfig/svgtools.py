@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Make the svg output of matplotlib more compact"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import re
+
+# attributes with coordinates
+COORD_ATTRS = re.compile(
+    br'(\s(?:d|points|x|y|x1|y1|x2|y2|cx|cy|r)=")([^"]*)(")')
+# the offsets in a transform (the scale factors of glyphs are kept)
+TRANSFORM_ATTR = re.compile(br'(\stransform=")([^"]*)(")')
+TRANSLATE = re.compile(br"(translate\()([^)]*)(\))")
+NUMBER = re.compile(br"-?\d+\.\d+(?:[eE][-+]?\d+)?")
+
+
+def format_number(number, precision):
+    """Format number with at most precision decimals"""
+    text = "{0:.{1}f}".format(float(number), precision)
+    if "." in text:
+        text = text.rstrip("0").rstrip(".")
+    if text in ("-0", ""):
+        text = "0"
+    return text.encode("ascii")
+
+
+def round_coords(svg, precision):
+    """Round the numbers in the coordinate attributes of svg (bytes)"""
+
+    def round_numbers(match):
+        """Round all numbers in the attribute value"""
+        value = NUMBER.sub(
+            lambda number: format_number(number.group(), precision),
+            match.group(2))
+        return match.group(1) + value + match.group(3)
+
+    def round_translate(match):
+        """Round the numbers of the translations in the transform"""
+        return (match.group(1) +
+                TRANSLATE.sub(round_numbers, match.group(2)) +
+                match.group(3))
+
+    return TRANSFORM_ATTR.sub(round_translate,
+                              COORD_ATTRS.sub(round_numbers, svg))
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Compile all usetex strings of a figure before the first draw
+
+The strings are written as the pages of one tex file, compiled with one
+latex run, and the dvi file is split into one dvi file per page under
+the names which matplotlib uses for its tex cache. The png files are
+made with dvipng from the same (multi-page) dvi file."""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from multiprocessing.pool import ThreadPool
+
+import matplotlib.text
+import matplotlib.texmanager
+import six
+
+from .exceptions import PyfigError
+from . import tools
+
+# dvi opcodes
+SET_RULE, PUT_RULE, BOP, EOP = 132, 137, 139, 140
+FNT_NUM_0, FNT_NUM_63, FNT_1, XXX_1, FNT_DEF_1 = 171, 234, 235, 239, 243
+PRE, POST, POST_POST = 247, 248, 249
+# the first opcodes of the commands with a 1-4 byte parameter
+# (set, put, right, w, x, down, y, z, fnt)
+PARAMETER_OPCODES = (128, 133, 143, 148, 153, 157, 162, 167, FNT_1)
+
+
+def get_strings(fig):
+    """The (tex, fontsize) of all texts and ticklabels of fig"""
+
+    strings = set()
+    for text in fig.findobj(matplotlib.text.Text):
+        if text.get_visible() and text.get_text() != "":
+            for line in text.get_text().split("\n"):
+                strings.add((line, text.get_size()))
+
+    for ax in fig.get_new_axes():
+        for axis in (ax.xaxis, ax.yaxis):
+            ticks = axis.get_major_ticks()
+            if len(ticks) == 0:
+                continue
+            size = ticks[0].label1.get_size()
+            formatter = axis.get_major_formatter()
+            locs = axis.get_majorticklocs()
+            formatter.set_locs(locs)
+            for pos, loc in enumerate(locs):
+                label = formatter(loc, pos)
+                if label != "":
+                    strings.add((label, size))
+    return strings
+
+
+def command_length(data, pos):
+    """The length (bytes) of the dvi command at pos of data"""
+    opcode = six.indexbytes(data, pos)
+    if opcode in (SET_RULE, PUT_RULE):
+        return 9
+    if opcode == BOP:
+        return 45
+    if opcode == PRE:
+        return 15 + six.indexbytes(data, pos + 14)
+    if opcode == POST:
+        return 29
+    for first in PARAMETER_OPCODES:
+        if first <= opcode < first + 4:
+            return 2 + opcode - first
+    if XXX_1 <= opcode < XXX_1 + 4:
+        size = opcode - XXX_1 + 1
+        return 1 + size + read_unsigned(data, pos + 1, size)
+    if FNT_DEF_1 <= opcode < FNT_DEF_1 + 4:
+        size = opcode - FNT_DEF_1 + 1
+        names = pos + 1 + size + 12
+        return (names + 2 - pos + six.indexbytes(data, names) +
+                six.indexbytes(data, names + 1))
+    # set_char, nop, eop, push, pop, w0, x0, y0, z0, fnt_num
+    return 1
+
+
+def read_unsigned(data, pos, size):
+    """The unsigned integer of size bytes at pos of data"""
+    value = 0
+    for index in range(pos, pos + size):
+        value = 256 * value + six.indexbytes(data, index)
+    return value
+
+
+def get_font(data, pos):
+    """The font number which the command at pos selects or defines
+       (None for other commands)"""
+    opcode = six.indexbytes(data, pos)
+    if FNT_NUM_0 <= opcode <= FNT_NUM_63:
+        return opcode - FNT_NUM_0
+    if FNT_1 <= opcode < FNT_1 + 4:
+        return read_unsigned(data, pos + 1, opcode - FNT_1 + 1)
+    if FNT_DEF_1 <= opcode < FNT_DEF_1 + 4:
+        return read_unsigned(data, pos + 1, opcode - FNT_DEF_1 + 1)
+    return None
+
+
+def split_dvi(data):
+    """Split the dvi file data into one dvi file (bytes) per page
+       Each page defines its fonts, like a dvi file of a single page"""
+
+    pos = command_length(data, 0)
+    preamble = data[:pos]
+    definitions = {}
+    pages = []
+    commands = []
+    fonts = []
+    while six.indexbytes(data, pos) != POST:
+        opcode = six.indexbytes(data, pos)
+        length = command_length(data, pos)
+        if FNT_DEF_1 <= opcode < FNT_DEF_1 + 4:
+            definitions[get_font(data, pos)] = data[pos:pos + length]
+        elif opcode == BOP:
+            commands = []
+            fonts = []
+        elif opcode == EOP:
+            pages.append((fonts, b"".join(commands)))
+        elif FNT_NUM_0 <= opcode < FNT_1 + 4:
+            if get_font(data, pos) not in fonts:
+                fonts.append(get_font(data, pos))
+            commands.append(data[pos:pos + length])
+        else:
+            commands.append(data[pos:pos + length])
+        pos += length
+    # the maximum height + depth, width and stack depth of the pages
+    limits = data[pos + 17:pos + 27]
+
+    files = []
+    for fonts, commands in pages:
+        fontdefs = b"".join(definitions[font] for font in fonts)
+        # a first page (counter 1), without a previous page
+        page = (struct.pack(">B10i", BOP, 1, *([0] * 9)) +
+                struct.pack(">i", -1) + fontdefs + commands +
+                struct.pack(">B", EOP))
+        post = (struct.pack(">BI", POST, len(preamble)) + preamble[2:14] +
+                limits[:8] + limits[8:10] + struct.pack(">H", 1) +
+                fontdefs)
+        size = len(preamble) + len(page) + len(post) + 6
+        post_post = (struct.pack(">BIB", POST_POST,
+                                 len(preamble) + len(page), 2) +
+                     b"\xdf" * (4 + -size % 4))
+        files.append(preamble + page + post + post_post)
+    return files
+
+
+def write_file(fname, data):
+    """Write data to fname, such that other processes never read
+       a partial file"""
+    handle, temp = tempfile.mkstemp(dir=os.path.dirname(fname))
+    with os.fdopen(handle, "wb") as fobj:
+        fobj.write(data)
+    getattr(os, "replace", os.rename)(temp, fname)
+
+
+def copy_file(source, fname):
+    """Copy source to fname, such that other processes never read
+       a partial file"""
+    with open(source, "rb") as fobj:
+        write_file(fname, fobj.read())
+
+
+def get_names(manager, string, dpis):
+    """The dvi and png files of matplotlib's tex cache for string"""
+    tex, fontsize = string
+    return ([manager.get_basefile(tex, fontsize) + ".dvi"] +
+            [manager.get_basefile(tex, fontsize, dpi) + ".png"
+             for dpi in dpis])
+
+
+def run(command, cwd):
+    """Run the latex or dvipng command in cwd"""
+    try:
+        subprocess.check_output(command, cwd=cwd, stderr=subprocess.STDOUT)
+    except OSError as err:
+        raise PyfigError("Cannot run {0}: {1}".format(command[0], err))
+
+
+def compile_batch(manager, strings, dpis, jobs):
+    """Compile strings with one latex run, as the pages of one tex file
+       (and one dvipng run per dpi and job)"""
+
+    header = None
+    bodies = []
+    for tex, fontsize in strings:
+        header, body = manager._get_tex_source(tex, fontsize).split(
+            r"\begin{document}")
+        bodies.append(body.replace(r"\end{document}", ""))
+    source = "\n".join([header, r"\begin{document}",
+                        "\n\\newpage\n".join(bodies), r"\end{document}"])
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        with open(os.path.join(tmpdir, "strings.tex"), "wb") as fobj:
+            fobj.write(source.encode("utf-8"))
+        run(["latex", "-interaction=nonstopmode", "-halt-on-error",
+             "-no-shell-escape", "strings.tex"], tmpdir)
+        with open(os.path.join(tmpdir, "strings.dvi"), "rb") as fobj:
+            pages = split_dvi(fobj.read())
+        if len(pages) != len(strings):
+            raise PyfigError("latex made {0} pages for {1} strings".format(
+                len(pages), len(strings)))
+
+        chunk = -(-len(strings) // max(1, jobs))
+        commands = [
+            ["dvipng", "-bg", "Transparent", "-D", str(dpi), "-T", "tight",
+             "-pp", "{0}-{1}".format(first + 1,
+                                     min(first + chunk, len(strings))),
+             "-o", "{0}-%d.png".format(dpi), "strings.dvi"]
+            for dpi in dpis for first in range(0, len(strings), chunk)]
+        pool = ThreadPool(max(1, min(jobs, len(commands))))
+        try:
+            pool.map(lambda command: run(command, tmpdir), commands)
+        finally:
+            pool.close()
+            pool.join()
+
+        for index, string in enumerate(strings):
+            names = get_names(manager, string, dpis)
+            write_file(names[0], pages[index])
+            for dpi, name in zip(dpis, names[1:]):
+                copy_file(os.path.join(tmpdir, "{0}-{1}.png".format(
+                    dpi, index + 1)), name)
+    finally:
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def compile_strings(strings, dpis, jobs=4, cache=""):
+    """Run latex (and dvipng for each dpi) for all strings,
+       which are not in the on-disk cache of matplotlib yet
+       cache: a directory (shared by all processes) which holds
+       a copy of all compiled strings"""
+
+    manager = matplotlib.texmanager.TexManager()
+    missing = []
+    for string in sorted(strings):
+        for name in get_names(manager, string, dpis):
+            shared = os.path.join(cache, os.path.basename(name))
+            if (cache != "" and not os.path.exists(name) and
+                    os.path.exists(shared)):
+                copy_file(shared, name)
+            if not os.path.exists(name):
+                missing.append(string)
+                break
+    if len(missing) == 0:
+        return
+
+    try:
+        if not hasattr(manager, "_get_tex_source"):
+            # older versions of matplotlib
+            raise PyfigError("No tex source of matplotlib")
+        compile_batch(manager, missing, dpis, jobs)
+    except (subprocess.CalledProcessError, PyfigError):
+        # compile one by one, matplotlib reports the string which fails
+        for tex, fontsize in missing:
+            manager.make_dvi(tex, fontsize)
+            for dpi in dpis:
+                manager.make_png(tex, fontsize, dpi)
+
+    if cache != "":
+        for string in missing:
+            for name in get_names(manager, string, dpis):
+                shared = os.path.join(cache, os.path.basename(name))
+                if not os.path.exists(shared):
+                    copy_file(name, shared)
+
+
+def prime_cache(fig, dpis):
+    """Compile all usetex strings of fig before it is drawn"""
+    cache = os.path.expanduser(fig.settings["tex_cache"])
+    if cache != "":
+        tools.create_dir(cache, is_dir=True)
+    compile_strings(get_strings(fig), dpis, jobs=fig.settings["tex_jobs"],
+                    cache=cache)
@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Tick locators and formatters shared by axes with identical limits"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import datetime
+
+import numpy
+import matplotlib.ticker
+import six
+
+# attributes which formatters update in set_locs, and the rrule arguments
+# which date locators set from the view limits (not part of the config)
+TRANSIENT = ("axis", "locs", "_locs", "orderOfMagnitude",
+             "_orderOfMagnitude", "offset", "format", "dtstart", "until")
+# objects nested deeper in a locator/formatter are compared by identity
+MAX_DEPTH = 4
+
+
+def config_value(value, depth=0):
+    """A hashable key of value, which compares the configuration values
+       (and not the identity) of the objects in it"""
+
+    if value is None or isinstance(value, (bool, float, datetime.date,
+                                           six.integer_types,
+                                           six.string_types)):
+        return value
+    if isinstance(value, datetime.tzinfo):
+        return ("tzinfo", type(value).__name__, str(value))
+    if isinstance(value, numpy.generic):
+        return value.item()
+    if isinstance(value, numpy.ndarray):
+        return ("array", value.shape, tuple(value.ravel().tolist()))
+    if isinstance(value, (list, tuple)):
+        return tuple(config_value(elem, depth) for elem in value)
+    if isinstance(value, dict):
+        return tuple(sorted((config_value(key, depth),
+                             config_value(elem, depth))
+                            for key, elem in value.items()))
+    if isinstance(value, SharedLocator):
+        return config_value(value.locator, depth)
+    if isinstance(value, SharedFormatter):
+        return config_value(value.formatter, depth)
+    if depth < MAX_DEPTH and hasattr(value, "_construct"):
+        # rrulewrapper (dates): the arguments of the rrule
+        return (type(value).__name__,
+                config_value(dict((key, elem) for key, elem
+                                  in value._construct.items()
+                                  if key not in TRANSIENT), depth + 1))
+    if depth < MAX_DEPTH and hasattr(value, "__dict__"):
+        return signature(value, depth + 1)
+    return value
+
+
+def signature(obj, depth=0):
+    """The type and configuration of a locator/formatter"""
+    return (type(obj).__name__,
+            tuple(sorted((key, config_value(value, depth))
+                         for key, value in vars(obj).items()
+                         if key not in TRANSIENT)))
+
+
+def axis_key(axis):
+    """The name, scale, limits and length of an axis"""
+    vmin, vmax = axis.get_view_interval()
+    bbox = axis.axes.bbox
+    return (axis.axis_name, axis.get_scale(), float(vmin), float(vmax),
+            round(bbox.width if axis.axis_name == "x" else bbox.height))
+
+
+class SharedLocator(matplotlib.ticker.Locator):
+    """Locator which computes the ticks once for all identical axes
+       The key contains the view limits, so the ticks are recomputed
+       when the limits change"""
+
+    def __init__(self, locator, cache):
+        self.locator = locator
+        self.cache = cache
+        self.axis = None
+
+    def set_axis(self, axis):
+        self.axis = axis
+        self.locator.set_axis(axis)
+
+    def __call__(self):
+        key = ("locs", signature(self.locator), axis_key(self.axis))
+        if key not in self.cache:
+            self.cache[key] = tuple(self.locator())
+        return list(self.cache[key])
+
+    def tick_values(self, vmin, vmax):
+        return self.locator.tick_values(vmin, vmax)
+
+    def view_limits(self, vmin, vmax):
+        return self.locator.view_limits(vmin, vmax)
+
+    def nonsingular(self, vmin, vmax):
+        return self.locator.nonsingular(vmin, vmax)
+
+
+class SharedFormatter(matplotlib.ticker.Formatter):
+    """Formatter which formats the ticks once for all identical axes"""
+
+    def __init__(self, formatter, cache):
+        self.formatter = formatter
+        self.cache = cache
+        self.axis = None
+        self.labels = {}
+        self.offset = ""
+
+    def set_axis(self, axis):
+        self.axis = axis
+        self.formatter.set_axis(axis)
+
+    def set_locs(self, locs):
+        key = ("labels", signature(self.formatter), axis_key(self.axis),
+               tuple(locs))
+        if key not in self.cache:
+            self.formatter.set_locs(locs)
+            self.cache[key] = (
+                dict((loc, self.formatter(loc, pos))
+                     for pos, loc in enumerate(locs)),
+                self.formatter.get_offset())
+        else:
+            # keep the state of the wrapped formatter for other values
+            if hasattr(type(self.formatter), "_locs"):
+                self.formatter._locs = locs
+            else:
+                # older versions of matplotlib
+                self.formatter.locs = locs
+        self.labels, self.offset = self.cache[key]
+
+    def __call__(self, x, pos=None):
+        if x in self.labels:
+            return self.labels[x]
+        return self.formatter(x, pos)
+
+    def get_offset(self):
+        return self.offset
+
+    def format_data(self, value):
+        return self.formatter.format_data(value)
+
+    def format_data_short(self, value):
+        return self.formatter.format_data_short(value)
+
+
+def share_ticks(ax, cache):
+    """Share the major locators and formatters of ax via cache"""
+    for axis in (ax.xaxis, ax.yaxis):
+        locator = axis.get_major_locator()
+        if not isinstance(locator, (SharedLocator,
+                                    matplotlib.ticker.FixedLocator,
+                                    matplotlib.ticker.NullLocator)):
+            axis.set_major_locator(SharedLocator(locator, cache))
+        formatter = axis.get_major_formatter()
+        if not isinstance(formatter, (SharedFormatter,
+                                      matplotlib.ticker.FixedFormatter,
+                                      matplotlib.ticker.NullFormatter)):
+            axis.set_major_formatter(SharedFormatter(formatter, cache))
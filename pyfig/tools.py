@@ -10,7 +10,6 @@ from __future__ import (division, absolute_import, unicode_literals,
 
 # pylint: disable=C0302
 
-import collections
 import os
 import shutil
 import validate
@@ -18,6 +17,11 @@ import configobj
 import numpy
 import six
 
+try:
+    from collections.abc import Iterable
+except ImportError:
+    from collections import Iterable
+
 
 def cobj_check(settings, exception=None, copy=False):
     """Check for errors in config file"""
@@ -60,7 +64,7 @@ def flatten(list_of_lists):
     """Return a flattened list"""
 
     for elem in list_of_lists:
-        if (isinstance(elem, collections.Iterable) and
+        if (isinstance(elem, Iterable) and
                 not isinstance(elem, six.string_types)):
             for sub in flatten(elem):
                 yield sub
@@ -68,6 +72,49 @@ def flatten(list_of_lists):
             yield elem
 
 
+def as_array(data, numeric=False):
+    """Return data as numpy array, without copying when possible
+       (ndarrays, memmaps, buffer protocol and arrow arrays stay views)
+       numeric: convert to float64 if the dtype is not a number"""
+
+    if isinstance(data, numpy.ndarray):
+        array = data
+    elif isinstance(data, (list, tuple)):
+        array = numpy.asarray(data)
+    elif hasattr(data, "to_numpy"):
+        # arrow arrays (zero copy if possible) and pandas objects
+        try:
+            array = data.to_numpy(zero_copy_only=True)
+        except TypeError:
+            array = numpy.asarray(data.to_numpy())
+        except Exception:  # pylint: disable=W0703
+            # arrow raises ArrowInvalid when a copy is required (nulls)
+            array = data.to_numpy(zero_copy_only=False)
+    else:
+        # memoryview, array.array and other buffer protocol objects
+        array = numpy.asarray(data)
+
+    if numeric and array.dtype.kind not in "biuf":
+        array = array.astype(numpy.float64)
+    return array
+
+
+def is_array_like(data):
+    """Whether data can be converted by as_array"""
+    if isinstance(data, six.string_types + (bytes, dict)):
+        return False
+    if (isinstance(data, (numpy.ndarray, list, tuple, memoryview)) or
+            hasattr(data, "to_numpy") or
+            hasattr(data, "__array__") or
+            hasattr(data, "__array_interface__")):
+        return True
+    try:
+        memoryview(data)
+    except TypeError:
+        return False
+    return True
+
+
 class Cache(object):
     """Class which save output when called"""
     # (too few public methods) pylint: disable=R0903
@@ -18,6 +18,7 @@ setup(
     url = 'https://github.com/epispread/pyfig',
     download_url = 'https://github.com/epispread/pyfig/tarball/201605.1',
     keywords = ["matplotlib", "python", "plotting"],
+    entry_points={"console_scripts": ["pyfig = pyfig.cli:main"]},
     classifiers = [])
 
 #     cmdclass={"build_py": build_py},
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Benchmark: the time of fig.layout() for grids up to 20 x 15 axes
+(PYTHONPATH=. python tests/bench_layout.py)"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+import os
+import sys
+import time
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from test_layout import LABELS, make_grid  # noqa: E402
+
+COLS = 15
+ROWS = (5, 10, 20)
+
+
+def main():
+    """Print the layout time per grid and per axes"""
+    logging.getLogger("matplotlib.font_manager").disabled = True
+    warnings.simplefilter("ignore")
+    print("{0:>8} {1:>6} {2:>9} {3:>12}".format(
+        "grid", "axes", "layout s", "ms per axes"))
+    for rows in ROWS:
+        fig = make_grid(rows, COLS, LABELS)
+        start = time.time()
+        fig.layout()
+        seconds = time.time() - start
+        print("{0:>8} {1:>6} {2:>9.2f} {3:>12.1f}".format(
+            "{0}x{1}".format(rows, COLS), rows * COLS, seconds,
+            1000 * seconds / (rows * COLS)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Benchmark: the encode time and file size of the png/webp options
+(PYTHONPATH=. python tests/bench_png.py)"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import io
+import logging
+import time
+
+import matplotlib.image
+import numpy
+
+import pyfig
+from pyfig import raster
+
+DPI = 300
+REPEAT = 3
+# (name, encoder, options)
+OPTIONS = [
+    ("matplotlib", None, {}),
+    ("level 1", raster.write_png, {"level": 1}),
+    ("level 6", raster.write_png, {"level": 6}),
+    ("level 9", raster.write_png, {"level": 9}),
+    ("sub", raster.write_png, {"png_filter": "sub"}),
+    ("up", raster.write_png, {"png_filter": "up"}),
+    ("paeth", raster.write_png, {"png_filter": "paeth"}),
+    ("filtered", raster.write_png, {"png_filter": "paeth",
+                                    "strategy": "filtered"}),
+    ("huffman", raster.write_png, {"strategy": "huffman"}),
+    ("rle", raster.write_png, {"strategy": "rle"}),
+    ("palette", raster.write_png, {"max_colors": 256}),
+    ("webp 80", raster.write_webp, {"quality": 80}),
+    ("webp lossless", raster.write_webp, {"lossless": True})]
+
+
+def make_rgba():
+    """The pixels of a typical figure (lines, legend, labels)"""
+    fig = pyfig.Figure({"rows": [1, 1], "cols": [1, 1]}, check=True)
+    rng = numpy.random.RandomState(0)
+    for row in range(2):
+        for col in range(2):
+            ax = fig.add_ax(row, col)
+            for series in range(3):
+                ax.plot(numpy.arange(200), rng.randn(200).cumsum(),
+                        color="mix", label="series {0}".format(series))
+            ax.set_xlabel("time")
+            ax.set_ylabel("value")
+    fig.layout()
+    return fig.render_rgba(DPI)
+
+
+def encode(encoder, rgba, options):
+    """The encoded bytes and the best time of REPEAT runs"""
+    best = None
+    for _ in range(REPEAT):
+        fobj = io.BytesIO()
+        start = time.time()
+        if encoder is None:
+            matplotlib.image.imsave(fobj, rgba, format="png")
+        else:
+            encoder(fobj, rgba, **options)
+        seconds = time.time() - start
+        best = seconds if best is None else min(best, seconds)
+    return fobj.getvalue(), best
+
+
+def main():
+    """Print the encode time and size of each option"""
+    logging.getLogger("matplotlib.font_manager").disabled = True
+    rgba = make_rgba()
+    print("{0} x {1} pixels".format(rgba.shape[1], rgba.shape[0]))
+    print("{0:<14} {1:>9} {2:>9}".format("option", "ms", "kB"))
+    for name, encoder, options in OPTIONS:
+        data, seconds = encode(encoder, rgba, options)
+        print("{0:<14} {1:>9.1f} {2:>9.1f}".format(
+            name, 1000 * seconds, len(data) / 1024))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Benchmark: the time of fig.layout() against fig.save(), and of one
+measurement pass against a draw to a raw buffer and to a png file
+(PYTHONPATH=. python tests/bench_save.py)"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import io
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+import matplotlib.figure
+import numpy
+
+import pyfig
+
+REPEAT = 5
+
+
+def make_figure(settings=None):
+    """A typical figure (2 x 2 axes with lines, legend and labels)"""
+    fig = pyfig.Figure(dict({"rows": [1, 1], "cols": [1, 1]},
+                            **(settings or {})), check=True)
+    rng = numpy.random.RandomState(0)
+    for row in range(2):
+        for col in range(2):
+            ax = fig.add_ax(row, col)
+            for series in range(3):
+                ax.plot(numpy.arange(200), rng.randn(200).cumsum(),
+                        color="mix", label="series {0}".format(series))
+            ax.set_xlabel("time")
+            ax.set_ylabel("value")
+    return fig
+
+
+def get_time(action, laid_out=False):
+    """The best time of REPEAT runs of action on a new figure"""
+    best = None
+    for _ in range(REPEAT):
+        with make_figure() as fig:
+            if laid_out:
+                fig.layout()
+            start = time.time()
+            action(fig)
+            seconds = time.time() - start
+        best = seconds if best is None else min(best, seconds)
+    return best
+
+
+def draw(fig, fmt, fname=None):
+    """A measurement draw of the laid out fig to fmt"""
+    matplotlib.figure.Figure.savefig(
+        fig, io.BytesIO() if fname is None else fname, format=fmt,
+        dpi=fig.measure_dpi)
+
+
+def main():
+    """Print the time of layout() and of save() per output format"""
+    logging.getLogger("matplotlib.font_manager").disabled = True
+    dirname = tempfile.mkdtemp()
+    try:
+        actions = [("layout()", lambda fig: fig.layout())]
+        for ext in ("png", "pdf", "svg"):
+            actions.append((
+                "save(.{0})".format(ext),
+                lambda fig, ext=ext: fig.save(
+                    os.path.join(dirname, "figure." + ext))))
+        fname = os.path.join(dirname, "draw.png")
+        actions.extend([
+            ("draw (measure)", lambda fig: fig._temp_save()),
+            ("draw (rgba)", lambda fig: draw(fig, "rgba")),
+            ("draw (png)", lambda fig: draw(fig, "png", fname))])
+        print("{0:<14} {1:>9}".format("action", "ms"))
+        for name, action in actions:
+            print("{0:<14} {1:>9.1f}".format(
+                name, 1000 * get_time(action, name.startswith("draw"))))
+    finally:
+        shutil.rmtree(dirname)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Benchmark: the size of svg/svgz output with the svg options
+against the default svg (PYTHONPATH=. python tests/bench_svg.py)"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_save import make_figure  # noqa: E402
+
+# (name, extension, settings)
+OPTIONS = [
+    ("default", "svg", {}),
+    ("precision 2", "svg", {"svg_precision": 2}),
+    ("precision 1", "svg", {"svg_precision": 1}),
+    ("fonttype none", "svg", {"svg_fonttype": "none"}),
+    ("both", "svg", {"svg_precision": 1, "svg_fonttype": "none"}),
+    ("svgz", "svgz", {}),
+    ("svgz both", "svgz", {"svg_precision": 1, "svg_fonttype": "none"})]
+
+
+def main():
+    """Print the save time and size of each option"""
+    logging.getLogger("matplotlib.font_manager").disabled = True
+    dirname = tempfile.mkdtemp()
+    try:
+        print("{0:<14} {1:>9} {2:>9} {3:>9}".format(
+            "option", "ms", "kB", "% default"))
+        default = None
+        for name, ext, settings in OPTIONS:
+            fname = os.path.join(dirname, "figure." + ext)
+            with make_figure(settings) as fig:
+                start = time.time()
+                fig.save(fname)
+                seconds = time.time() - start
+            size = os.path.getsize(fname)
+            default = size if default is None else default
+            print("{0:<14} {1:>9.1f} {2:>9.1f} {3:>9.1f}".format(
+                name, 1000 * seconds, size / 1024, 100 * size / default))
+    finally:
+        shutil.rmtree(dirname)
+
+
+if __name__ == "__main__":
+    main()
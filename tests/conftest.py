@@ -0,0 +1,33 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The slow tests only run with pytest --slow"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import pytest
+
+
+def pytest_addoption(parser):
+    """The --slow option"""
+    parser.addoption("--slow", action="store_true",
+                     help="also run the tests marked slow")
+
+
+def pytest_configure(config):
+    """Register the slow marker"""
+    config.addinivalue_line("markers", "slow: a test of minutes (--slow)")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip the slow tests without --slow"""
+    if config.getoption("--slow"):
+        return
+    skip = pytest.mark.skip(reason="slow, run with --slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The layout of each backend agrees with the agg layout"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig import backends
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def get_layout(backend):
+    """The layout of a labelled 2 x 2 figure with a legend"""
+    fig = pyfig.Figure({"rows": [1, 1], "cols": [1, 1], "figsize": [8, 6],
+                        "dpi": 100,
+                        "title": "Layout of the backends",
+                        "bottom_labels": True, "left_labels": True,
+                        "abc_labels": True, "backend": backend}, check=True)
+    for row in range(2):
+        for col in range(2):
+            ax = fig.add_ax(row, col)
+            ax.plot(numpy.arange(10), numpy.arange(10) * (row + col + 1),
+                    label="series {0}".format(row + col))
+            ax.plot(numpy.arange(10), numpy.arange(10) ** 2,
+                    label="a longer label of the squares")
+            ax.set_xlabel("time (days)")
+            ax.set_ylabel("amount (thousands)")
+    with fig:
+        return fig.layout()
+
+
+def to_pixels(bounds, layout):
+    """The (x, y, width, height) figure fractions in pixels"""
+    scale = numpy.array([layout["width"], layout["height"]] * 2)
+    return numpy.array(bounds) * scale
+
+
+@pytest.mark.parametrize("backend", ["pdf", "svg", "cairo"])
+def test_layout_tolerance(backend):
+    """The axes and legends are within LAYOUT_TOLERANCE pixels"""
+    if backend == "cairo":
+        pytest.importorskip("cairo")
+    expected = get_layout("agg")
+    layout = get_layout(backend)
+    assert len(layout["axes"]) == len(expected["axes"]) == 4
+    for ax, expected_ax in zip(layout["axes"], expected["axes"]):
+        assert (ax["row"], ax["col"]) == (expected_ax["row"],
+                                          expected_ax["col"])
+        assert (abs(to_pixels(ax["position"], layout) -
+                    to_pixels(expected_ax["position"], expected)) <=
+                backends.LAYOUT_TOLERANCE).all()
+    assert len(layout["legends"]) == len(expected["legends"]) > 0
+    for legend, expected_legend in zip(layout["legends"],
+                                       expected["legends"]):
+        assert legend["labels"] == expected_legend["labels"]
+        assert (abs(to_pixels(legend["bbox"], layout) -
+                    to_pixels(expected_legend["bbox"], expected)) <=
+                backends.LAYOUT_TOLERANCE).all()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Axes.barplot draws its bars and error bars as a few collections"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import matplotlib.axes
+import matplotlib.collections
+import matplotlib.colors
+import pytest
+
+import pyfig
+
+CITIES = ["city {0}".format(city) for city in range(300)]
+HOUSES = ["north", "south", "east"]
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def make_barplot(colors, horizontal=False, errors=False, **kwargs):
+    """A figure with a barplot of 300 cities x 3 houses"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1]}, check=True)
+    ax = fig.add_ax(0, 0)
+    ax.horizontal = horizontal
+    data = {}
+    for city_index, city in enumerate(CITIES):
+        for house_index, house in enumerate(HOUSES):
+            value = 1 + city_index % 7 + house_index
+            data[(city, house)] = ([value, 0.5, 0.25] if errors else value)
+    ax.barplot(data, {"city": CITIES, "house": HOUSES},
+               {"house": colors}, **kwargs)
+    return fig, ax
+
+
+def get_bars(ax):
+    """The bar collections of ax"""
+    return [collection for collection in ax.collections
+            if isinstance(collection, matplotlib.collections.PatchCollection)]
+
+
+def test_one_collection_per_colour_group():
+    """Each house is one collection, the error bars one LineCollection"""
+    fig, ax = make_barplot(["red", "green", "blue"], errors=True)
+    bars = get_bars(ax)
+    assert len(bars) == len(HOUSES)
+    assert len(ax.patches) == 0
+    for bar, color in zip(bars, ["red", "green", "blue"]):
+        assert len(bar.get_paths()) == len(CITIES)
+        assert (bar.get_facecolor() ==
+                matplotlib.colors.to_rgba(color)).all()
+    lines = [collection for collection in ax.collections
+             if isinstance(collection, matplotlib.collections.LineCollection)]
+    assert len(lines) == 1
+    assert len(lines[0].get_segments()) == len(CITIES) * len(HOUSES)
+    fig.close()
+
+
+def test_legend():
+    """One legend entry per house, in the legend of leg_place"""
+    fig, ax = make_barplot(["red", "mix", "mix"])
+    assert fig.labels["fig"] == HOUSES
+    proxies = fig.plotlines["fig"]
+    assert (matplotlib.colors.to_hex(proxies[0].get_facecolor()) ==
+            matplotlib.colors.to_hex("red"))
+    # the mix colors come from the repository of the legend
+    assert (proxies[1].get_facecolor() == get_bars(ax)[1].get_facecolor()[0]
+            ).all()
+    assert (matplotlib.colors.to_hex(proxies[1].get_facecolor()) ==
+            matplotlib.colors.to_hex(fig.style["fig"]["south"]))
+    fig.close()
+
+    fig, ax = make_barplot(["red", "green", "blue"], leg_place="fig2")
+    assert fig.labels["fig"] == []
+    assert fig.labels["fig2"] == HOUSES
+    fig.close()
+
+    fig, ax = make_barplot(["red", "green", "blue"], leg_place="none")
+    assert sum(len(labels) for labels in fig.labels.values()) == 0
+    assert len(get_bars(ax)) == len(HOUSES)
+    fig.close()
+
+
+def test_hatch():
+    """A hatched colour gives a hatched collection"""
+    fig, ax = make_barplot(["red-h(//)", "green", "blue-h(xx)"])
+    assert [bar.get_hatch() for bar in get_bars(ax)] == ["//", None, "xx"]
+    assert (matplotlib.colors.to_hex(get_bars(ax)[0].get_facecolor()[0]) ==
+            matplotlib.colors.to_hex("red"))
+    fig.close()
+
+
+@pytest.mark.parametrize("horizontal", [False, True])
+def test_limits(horizontal):
+    """The bars start at zero along the value axis, the cities
+       fill the other axis (swapped when horizontal)"""
+    fig, ax = make_barplot(["red", "green", "blue"], horizontal=horizontal)
+    # the largest bar: 1 + 6 (city) + 2 (east)
+    top = 9
+    values = (matplotlib.axes.Axes.get_xlim(ax) if horizontal else
+              matplotlib.axes.Axes.get_ylim(ax))
+    cities = (matplotlib.axes.Axes.get_ylim(ax) if horizontal else
+              matplotlib.axes.Axes.get_xlim(ax))
+    assert values[0] == 0
+    assert top <= values[1] <= 1.1 * top
+    assert cities == (0, len(CITIES))
+    assert ax.get_xlim() == (0, len(CITIES))
+    extents = get_bars(ax)[2].get_datalim(ax.transData)
+    if horizontal:
+        assert extents.xmax == top and extents.ymax < len(CITIES)
+    else:
+        assert extents.ymax == top and extents.xmax < len(CITIES)
+    fig.close()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The memory_budget setting: the estimate and how it is kept"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig import budget
+
+POINTS = 2000000
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def make_figure(memory_budget, figsize=(4, 3)):
+    """A figure with a line of 2M points"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1], "figsize": list(figsize),
+                        "dpi": 100, "memory_budget": memory_budget},
+                       check=True)
+    ax = fig.add_ax(0, 0)
+    xdata = numpy.arange(POINTS)
+    ydata = (numpy.sin(xdata / 1000) +
+             numpy.random.RandomState(0).rand(POINTS))
+    ax.plot(xdata, ydata, label="noise")
+    ax.set_xlabel("time")
+    ax.set_ylabel("signal")
+    return fig, ax.lines[0]
+
+
+def test_estimate():
+    """The canvas (raster output) and the vertices of the line"""
+    fig, _line = make_figure(0)
+    canvas = 2 * 4 * 3 * 100 ** 2 * 4
+    vector = budget.estimate(fig, 100, ".pdf")
+    assert vector >= POINTS * budget.VERTEX_BYTES
+    assert budget.estimate(fig, 100, ".png") == vector + canvas
+    assert budget.estimate(fig, 200, ".png") == vector + 4 * canvas
+    fig.close()
+
+
+def test_no_budget(tmpdir):
+    """Without a budget nothing is changed"""
+    fig, line = make_figure(0)
+    result = fig.save(str(tmpdir.join("line.png")))
+    assert result["actions"] == []
+    assert result["estimate"] > POINTS * budget.VERTEX_BYTES
+    assert len(line.get_xdata()) == POINTS
+    fig.close()
+
+
+def test_decimate(tmpdir, monkeypatch):
+    """The line is decimated to the final axes width while it is saved,
+       and restored afterwards"""
+    fig, line = make_figure(10)
+    xdata, ydata = line.get_xdata().copy(), line.get_ydata().copy()
+    drawn = []
+    savefig = pyfig.Figure.savefig
+
+    def measure(self, *args, **kwargs):
+        """The points and pixels of the line when it is drawn"""
+        drawn.append((len(line.get_xdata()),
+                      budget.get_pixels(line.axes, 100)[0]))
+        return savefig(self, *args, **kwargs)
+    monkeypatch.setattr(pyfig.Figure, "savefig", measure)
+
+    result = fig.save(str(tmpdir.join("line.png")))
+    assert result["actions"] == ["decimated 1 lines"]
+    assert result["estimate"] <= result["budget"] == 10 * 2 ** 20
+    (points, width), = drawn
+    # the minimum and maximum of each pixel (and the end points)
+    assert width < points <= 2 * width + 2
+    assert (line.get_xdata() == xdata).all()
+    assert (line.get_ydata() == ydata).all()
+    fig.close()
+
+
+def test_rasterise(tmpdir):
+    """Dense artists are rasterised in vector output (only while saved)"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1], "figsize": [4, 3],
+                        "memory_budget": 2}, check=True)
+    ax = fig.add_ax(0, 0)
+    scatter = ax.scatter(numpy.arange(50000), numpy.arange(50000) % 7)
+    result = fig.save(str(tmpdir.join("scatter.pdf")))
+    assert result["actions"] == ["rasterised 1 artists"]
+    assert not scatter.get_rasterized()
+    fig.close()
+
+
+def test_over_budget(tmpdir):
+    """The canvas alone is over the budget: an error, after decimating
+       (the line is restored)"""
+    fig, line = make_figure(1, figsize=(8, 6))
+    with pytest.raises(pyfig.PyfigError) as err:
+        fig.save(str(tmpdir.join("line.png")))
+    assert "decimated 1 lines" in str(err.value)
+    assert "memory_budget is 1" in str(err.value)
+    assert len(line.get_xdata()) == POINTS
+    assert not tmpdir.join("line.png").check()
+    fig.close()
+
+
+def test_measure_dpi():
+    """The measure dpi is lowered for a backend which draws to measure,
+       not for the backends which only measure"""
+    fig, _line = make_figure(0.5, figsize=(8, 6))
+    assert budget.check_measure(fig) == []
+    fig.settings["backend"] = "cairo"
+    assert budget.check_measure(fig) == ["measure dpi 40"]
+    assert fig.measure_dpi == budget.MIN_MEASURE_DPI
+    assert budget.estimate_measure(fig, 40) < 2 ** 19
+    fig.settings["backend"] = "agg"
+    fig.close()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The pyfig command: rendering figure files and the build manifest"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import json
+import logging
+import os
+import struct
+import subprocess
+import sys
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig import cli
+
+SPEC = """[axes]
+    [[ili]]
+    row = 0
+    col = 0
+    xlabel = week
+        [[[cases]]]
+        kind = {kind}
+        data = cases.csv
+        x = 0
+        y = 1
+        label = cases
+"""
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+@pytest.fixture
+def catalogue(tmpdir):
+    """A figure file with its data and a settings file"""
+    numpy.savetxt(str(tmpdir.join("cases.csv")),
+                  numpy.column_stack((numpy.arange(20),
+                                      numpy.arange(20) ** 2)),
+                  delimiter=",")
+    tmpdir.join("ili.ini").write(SPEC.format(kind="plot"))
+    tmpdir.join("style.ini").write("figsize = 4, 3\ndpi = 50\n")
+    return tmpdir
+
+
+def render(tmpdir, *args):
+    """Render the figure files, return the exit status and summary"""
+    status = cli.main(["render", "--outdir", str(tmpdir.join("out")),
+                       "--summary", str(tmpdir.join("summary.json"))] +
+                      list(args))
+    return status, json.loads(tmpdir.join("summary.json").read())
+
+
+def test_render(catalogue):
+    """The outputs of each format, with the size of the settings"""
+    status, summary = render(catalogue, str(catalogue.join("ili.ini")),
+                             "--settings", str(catalogue.join("style.ini")),
+                             "--formats", "png,pdf")
+    assert status == 0
+    assert summary["rendered"] == 1 and summary["failed"] == 0
+    outputs = [str(catalogue.join("out", "ili." + fmt))
+               for fmt in ("png", "pdf")]
+    assert summary["figures"][0]["outputs"] == outputs
+    with open(outputs[0], "rb") as fobj:
+        header = fobj.read(24)
+    # the width and height of the png header: 4 x 3 inch at 50 dpi
+    assert struct.unpack(">II", header[16:24]) == (200, 150)
+    with open(outputs[1], "rb") as fobj:
+        assert fobj.read(4) == b"%PDF"
+
+    status, summary = render(catalogue, str(catalogue.join("ili.ini")),
+                             "--settings", str(catalogue.join("style.ini")),
+                             "--formats", "png,pdf", "--incremental")
+    assert status == 0 and summary["skipped"] == 1
+
+
+def test_render_jobs(catalogue):
+    """A failed (or missing) figure does not stop the others (in worker
+       processes)"""
+    catalogue.join("bad.ini").write(SPEC.format(kind="pie"))
+    fnames = [str(catalogue.join(name))
+              for name in ("ili.ini", "bad.ini", "missing.ini")]
+    status, summary = render(catalogue, "--jobs", "2", *fnames)
+    assert status == 1
+    assert [result["status"] for result in summary["figures"]] == [
+        "ok", "failed", "failed"]
+    assert "Unknown kind pie" in summary["figures"][1]["error"]
+    assert catalogue.join("out", "ili.png").check()
+    assert not catalogue.join("out", "missing.png").check()
+
+
+def test_module(catalogue):
+    """python -m pyfig, with the summary on stdout"""
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(
+        os.path.dirname(os.path.abspath(pyfig.__file__))))
+    output = subprocess.check_output(
+        [sys.executable, "-m", "pyfig", "render", "ili.ini",
+         "--settings", "style.ini", "--outdir", "out"],
+        cwd=str(catalogue), env=env)
+    summary = json.loads(output.decode("utf-8"))
+    assert summary["figures"][0]["outputs"] == [
+        os.path.join("out", "ili.png")]
+    assert catalogue.join("out", "ili.png").check()
+
+
+def build(tmpdir):
+    """Build the figure, return the summary and the manifest"""
+    status = cli.main(["build", str(tmpdir.join("ili.ini")),
+                       "--settings", str(tmpdir.join("style.ini")),
+                       "--outdir", str(tmpdir),
+                       "--manifest", str(tmpdir.join("manifest.json")),
+                       "--summary", str(tmpdir.join("summary.json"))])
+    summary = json.loads(tmpdir.join("summary.json").read())
+    assert status == (1 if summary["failed"] else 0)
+    return summary, json.loads(tmpdir.join("manifest.json").read())
+
+
+def get_status(summary):
+    """The status of the single figure"""
+    (result,) = summary["figures"]
+    return result["status"]
+
+
+def test_build_unchanged(catalogue):
+    """A figure whose inputs did not change is skipped"""
+    summary, manifest = build(catalogue)
+    assert get_status(summary) == "ok"
+    assert catalogue.join("ili.png").check()
+    figure = manifest["figures"][str(catalogue.join("ili.ini"))]
+    assert figure["outputs"] == [str(catalogue.join("ili.png"))]
+    assert str(catalogue.join("cases.csv")) in manifest["files"]
+
+    mtime = catalogue.join("ili.png").mtime()
+    summary, again = build(catalogue)
+    assert get_status(summary) == "skipped"
+    assert again == manifest
+    assert catalogue.join("ili.png").mtime() == mtime
+
+
+@pytest.mark.parametrize("fname,content", [
+    ("cases.csv", "0,1\n1,4\n2,9\n"),
+    ("style.ini", "figsize = 4, 3\ndpi = 60\n")])
+def test_build_changed(catalogue, fname, content):
+    """A changed data or settings file renders the figure again (a new
+       mtime with the same content does not)"""
+    _summary, manifest = build(catalogue)
+    fobj = catalogue.join(fname)
+    fobj.write(fobj.read())
+    fobj.setmtime(fobj.mtime() + 10)
+    summary, _manifest = build(catalogue)
+    assert get_status(summary) == "skipped"
+
+    fobj.write(content)
+    fobj.setmtime(fobj.mtime() + 20)
+    summary, changed = build(catalogue)
+    assert get_status(summary) == "ok"
+    figure = str(catalogue.join("ili.ini"))
+    assert (changed["figures"][figure]["digest"] !=
+            manifest["figures"][figure]["digest"])
+
+
+def test_build_failed(catalogue):
+    """A figure which fails is dropped from the manifest (and is built
+       again next time)"""
+    build(catalogue)
+    catalogue.join("ili.ini").write(SPEC.format(kind="pie"))
+    summary, manifest = build(catalogue)
+    assert get_status(summary) == "failed"
+    assert "Unknown kind pie" in summary["figures"][0]["error"]
+    assert manifest["figures"] == {}
+
+    summary, manifest = build(catalogue)
+    assert get_status(summary) == "failed"
+    catalogue.join("ili.ini").write(SPEC.format(kind="plot"))
+    summary, manifest = build(catalogue)
+    assert get_status(summary) == "ok"
+    assert list(manifest["figures"]) == [str(catalogue.join("ili.ini"))]
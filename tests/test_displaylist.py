@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""A replayed display list gives the same figure"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import datetime
+
+import numpy
+import pytest
+
+import pyfig
+
+
+def replay_equal(fig):
+    """Whether the replay of fig renders the same image"""
+    fig2 = pyfig.Figure.replay(fig.display.dumps())
+    fig.layout()
+    fig2.layout()
+    return (len(fig.axes) == len(fig2.axes) and
+            (fig.render_rgba(50) == fig2.render_rgba(50)).all())
+
+
+def test_twin_axes():
+    """The calls on a twin axes are replayed"""
+    fig = pyfig.Figure("", record=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.arange(3), [1, 2, 1], label="cases")
+    fig.add_ax2(ax).plot(numpy.arange(3), [30, 10, 20], color="red")
+    assert [call["method"] for call in fig.display.calls] == [
+        "add_ax", "plot", "add_ax2", "plot"]
+    assert replay_equal(fig)
+
+
+def test_dates():
+    """Dates (in lists and object arrays) are recorded"""
+    fig = pyfig.Figure("", record=True)
+    ax = fig.add_ax(0, 0)
+    dates = [datetime.date(2016, 1, day) for day in range(1, 11)]
+    ax.plot(dates, numpy.arange(10), label="cases")
+    ax.plot(numpy.array([datetime.datetime(2016, 1, day, 12)
+                         for day in range(1, 11)]),
+            numpy.arange(10)[::-1], label="deaths")
+    assert replay_equal(fig)
+
+
+def test_unrecordable():
+    """A call which cannot be recorded is drawn, saving fails"""
+    fig = pyfig.Figure("", record=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.arange(3), [1, 2, 1], label=object())
+    assert len(ax.lines) == 1
+    with pytest.raises(pyfig.PyfigError):
+        fig.display.dumps()
+
+
+def test_internal_calls():
+    """The calls matplotlib makes on the axes are not recorded"""
+    fig = pyfig.Figure("", record=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.arange(3), [1, 2, 1])
+    ax.set(ylim=(0, 3))
+    ax.get_xlim()
+    ax.autoscale_view()
+    ax.margins(0.1)
+    ax.sharex(fig.add_ax(0, 0))
+    ax.set_xlim(0, 2)
+    # matplotlib methods called by the user are recorded by their setters
+    ax.axis((0, 1, 0, 4))
+    assert [call["method"] for call in fig.display.calls] == [
+        "add_ax", "plot", "set_ylim", "add_ax", "set_xlim", "set_xlim",
+        "set_ylim"]
+    assert not fig.display.busy
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Axes.fan and the percentiles of an ensemble"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import matplotlib.colors
+import numpy
+import pytest
+
+import pyfig
+from pyfig import stream
+
+ENSEMBLE = numpy.random.RandomState(0).randn(200, 30).cumsum(axis=1)
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def test_percentiles():
+    """Exact percentiles per column, also read in blocks of columns"""
+    percentiles = [2.5, 50, 97.5]
+    expected = numpy.percentile(ENSEMBLE, percentiles, axis=0)
+    assert numpy.allclose(stream.get_percentiles(ENSEMBLE, percentiles),
+                          expected)
+    assert numpy.allclose(
+        stream.get_percentiles(ENSEMBLE, percentiles, max_elements=700),
+        expected)
+
+
+def test_percentiles_nan(tmpdir):
+    """Missing members (nan) are left out, memmaps are read"""
+    data = ENSEMBLE.copy()
+    data[::3, 5] = numpy.nan
+    numpy.save(str(tmpdir.join("ensemble.npy")), data)
+    memmap = numpy.load(str(tmpdir.join("ensemble.npy")), mmap_mode="r")
+    result = stream.get_percentiles(memmap, [50], max_elements=1000)
+    assert numpy.isfinite(result).all()
+    assert result[0, 5] == numpy.median(data[:, 5][~numpy.isnan(
+        data[:, 5])])
+
+
+def make_axes():
+    """A figure with one axes"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1]}, check=True)
+    return fig, fig.add_ax(0, 0)
+
+
+def test_band_order():
+    """The widest band is drawn first, each with its own label and color,
+       whatever the order of bands"""
+    fig, ax = make_axes()
+    polygons, lines = ax.fan(ENSEMBLE, bands=(50, 95, 90),
+                             colors=["red", "green", "blue"],
+                             labels=["50%", "95%", "90%"], label="median")
+    assert [matplotlib.colors.to_hex(polygon.get_facecolor())
+            for polygon in polygons] == [
+                matplotlib.colors.to_hex(color)
+                for color in ("green", "blue", "red")]
+    assert fig.labels["fig"] == ["95%", "90%", "50%", "median"]
+    assert fig.plotlines["fig"][:3] == polygons
+    for polygon, band in zip(polygons, (95, 90, 50)):
+        lower, upper = numpy.percentile(
+            ENSEMBLE, [(100 - band) / 2, 100 - (100 - band) / 2], axis=0)
+        xy = polygon.get_xy()
+        assert numpy.allclose(xy[:30, 1], lower)
+        assert numpy.allclose(xy[30:60, 1], upper[::-1])
+    assert numpy.allclose(lines[0].get_ydata(),
+                          numpy.median(ENSEMBLE, axis=0))
+    fig.close()
+
+
+@pytest.mark.parametrize("color", ["red", "red-a(0.5)", "mix"])
+def test_band_alpha(color):
+    """The bands have the color with increasing alpha (narrower bands
+       more opaque), also when the color has an alpha of its own"""
+    fig, ax = make_axes()
+    polygons, lines = ax.fan(ENSEMBLE, color=color, label="cases")
+    rgb = matplotlib.colors.to_rgb(lines[0].get_color())
+    assert numpy.allclose(
+        [polygon.get_facecolor() for polygon in polygons],
+        [rgb + (alpha,) for alpha in (0.15, 0.3, 0.45)])
+    if color == "red-a(0.5)":
+        assert lines[0].get_alpha() == 0.5
+    fig.close()
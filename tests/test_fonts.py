@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The fonts of the warmup are the fonts which matplotlib picks"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import matplotlib.font_manager
+
+from pyfig import config, fonts
+
+
+def test_families():
+    """Each family is listed once"""
+    settings = config.load_settings("[rc]\nfont.family = Arial\n")
+    assert fonts.get_families(settings) == ["Arial"]
+
+
+def test_generic():
+    """A generic family resolves to the font of findfont"""
+    fnames, missing = fonts.find_fonts(["sans-serif"])
+    assert missing == []
+    assert fnames[("sans-serif", "normal", "normal")] == (
+        matplotlib.font_manager.findfont(
+            matplotlib.font_manager.FontProperties(
+                family="sans-serif", style="normal", weight="normal")))
+
+
+def test_missing():
+    """Only a family without any match is missing"""
+    fnames, missing = fonts.find_fonts(["sans-serif", "No Such Family"])
+    assert missing == ["No Such Family"]
+    assert len(fnames) == len(fonts.VARIANTS)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The frames of save_frames show all animated artists once"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig.exceptions import PyfigError
+
+PIL_IMAGE = pytest.importorskip("PIL.Image")
+
+
+def count_pixels(fname, channel):
+    """The number of pixels of fname which are mostly channel (0-2)"""
+    rgb = numpy.asarray(PIL_IMAGE.open(fname).convert("RGB")).astype(int)
+    others = [index for index in range(3) if index != channel]
+    return int(((rgb[..., channel] > 200) &
+                (rgb[..., others].max(axis=-1) < 100)).sum())
+
+
+def make_frames(tmpdir):
+    """Frames in which the blue line is only returned in the first
+       frame and the green line is only returned (moved) in the last"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1]}, check=True)
+    ax = fig.add_ax(0, 0)
+    blue = ax.plot([0, 1], [0.2, 0.2], color="#0000ff", linewidth=3)[0]
+    green = ax.plot([0, 1], [0.8, 0.8], color="#00ff00", linewidth=3)[0]
+    ax.set_ylim(0, 1)
+
+    def update(frame):
+        """Change the data of frame"""
+        if frame == 0:
+            return [blue]
+        if frame == 2:
+            green.set_ydata([0.5, 0.5])
+            return [green]
+        return []
+    return fig.save_frames(update, range(3),
+                           str(tmpdir.join("f{0}.png")), dpi=50)
+
+
+def test_frames(tmpdir):
+    """An artist stays drawn after its frame and does not ghost"""
+    fnames = make_frames(tmpdir)
+    assert len(fnames) == 3
+    blue = [count_pixels(fname, 2) for fname in fnames]
+    green = [count_pixels(fname, 1) for fname in fnames]
+    assert blue[0] > 0
+    assert blue[1] == blue[0] == blue[2]
+    assert green[0] > 0
+    assert green[2] == green[0]
+
+
+def test_pattern(tmpdir):
+    """A file name without a frame number is an error"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1]}, check=True)
+    fig.add_ax(0, 0).plot([0, 1], [0, 1])
+    with pytest.raises(PyfigError):
+        fig.save_frames(lambda frame: [], range(2),
+                        str(tmpdir.join("frame.png")))
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Axes.heatmap and the reduction of large matrices"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import matplotlib.colors
+import matplotlib.image
+import numpy
+import pytest
+
+import pyfig
+from pyfig import stream
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def reference(data, shape, ufunc):
+    """The reduction of data to shape, cell by cell"""
+    rows = stream.get_edges(data.shape[0], shape[0])
+    cols = stream.get_edges(data.shape[1], shape[1])
+    return numpy.array([[ufunc(data[row0:row1, col0:col1])
+                         for col0, col1 in zip(cols[:-1], cols[1:])]
+                        for row0, row1 in zip(rows[:-1], rows[1:])])
+
+
+@pytest.mark.parametrize("how,ufunc", [("mean", numpy.mean),
+                                       ("max", numpy.max)])
+def test_reduce_matrix(how, ufunc):
+    """Uneven bins, read at once and in bands of a few rows"""
+    data = numpy.random.RandomState(0).rand(103, 71)
+    expected = reference(data, (10, 7), ufunc)
+    assert expected.shape == (10, 7)
+    assert numpy.allclose(stream.reduce_matrix(data, (10, 7), how),
+                          expected)
+    assert numpy.allclose(
+        stream.reduce_matrix(data, (10, 7), how, max_elements=500),
+        expected)
+
+
+def test_reduce_small():
+    """A matrix smaller than the shape is not enlarged"""
+    data = numpy.arange(12.).reshape(3, 4)
+    assert (stream.reduce_matrix(data, (10, 10)) == data).all()
+    with pytest.raises(pyfig.PyfigError):
+        stream.reduce_matrix(data, (2, 2), "median")
+
+
+def test_reduce_memmap(tmpdir):
+    """A memmap gives the same result as the array"""
+    data = numpy.random.RandomState(1).rand(500, 300).astype(numpy.float32)
+    memmap = numpy.lib.format.open_memmap(
+        str(tmpdir.join("data.npy")), mode="w+", dtype=numpy.float32,
+        shape=data.shape)
+    memmap[:] = data
+    memmap.flush()
+    memmap = numpy.load(str(tmpdir.join("data.npy")), mmap_mode="r")
+    assert numpy.allclose(
+        stream.reduce_matrix(memmap, (40, 30), "max", max_elements=3000),
+        stream.reduce_matrix(data, (40, 30), "max"))
+
+
+def make_axes(horizontal=False):
+    """A figure with one axes"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1], "figsize": [4, 3],
+                        "dpi": 100}, check=True)
+    ax = fig.add_ax(0, 0)
+    ax.horizontal = horizontal
+    return fig, ax
+
+
+@pytest.mark.parametrize("horizontal", [False, True])
+def test_heatmap_pixels(horizontal):
+    """The image has at most the pixels of the axes, one AxesImage"""
+    fig, ax = make_axes(horizontal)
+    data = numpy.random.RandomState(2).rand(2000, 3000)
+    image = ax.heatmap(data, reduce="max")
+    assert isinstance(image, matplotlib.image.AxesImage)
+    assert list(ax.images) == [image] and len(ax.patches) == 0
+    width, height = ax.get_axpos()[2] * 400, ax.get_axpos()[3] * 300
+    # the rows of the data are along x when horizontal
+    matrix = image.get_array()
+    assert matrix.shape == (int(height), int(width))
+    assert tuple(image.get_extent()) == ((0, 2000, 0, 3000) if horizontal
+                                         else (0, 3000, 0, 2000))
+    assert matrix.max() == data.max()
+    fig.close()
+
+
+def test_mix_color():
+    """A mix color is the color of the label, as for other plots"""
+    fig, ax = make_axes()
+    image = ax.heatmap(numpy.eye(10), colors="mix", label="cases")
+    line, = ax.plot([0, 1], [0, 1], color="mix", label="cases")
+    top = image.get_cmap()(1.0)
+    assert top == matplotlib.colors.to_rgba(line.get_color())
+    assert image.get_cmap()(0.0) == matplotlib.colors.to_rgba("white")
+    assert fig.labels["fig"] == ["cases"]
+    assert fig.plotlines["fig"][0].get_facecolor() == top
+    # the next label gets the next color of the repository
+    image = ax.heatmap(numpy.eye(10), colors=("white", "mix"),
+                       label="deaths")
+    assert image.get_cmap()(1.0) != top
+    fig.close()
+
+
+def test_legend_values():
+    """Legend boxes for values, with the colors of the colormap"""
+    fig, ax = make_axes()
+    image = ax.heatmap(numpy.arange(100.).reshape(10, 10),
+                       colors=["white", "red-a(0.5)"], legend=[0, 99],
+                       legend_format="{0:.0f} cases", leg_place="fig2")
+    assert fig.labels["fig2"] == ["0 cases", "99 cases"]
+    boxes = fig.plotlines["fig2"]
+    assert boxes[0].get_facecolor() == matplotlib.colors.to_rgba("white")
+    assert boxes[1].get_facecolor() == matplotlib.colors.to_rgba("red", 0.5)
+    assert image.get_cmap()(1.0) == matplotlib.colors.to_rgba("red", 0.5)
+    fig.close()
+
+
+def test_colormap():
+    """The name of a matplotlib colormap"""
+    fig, ax = make_axes()
+    image = ax.heatmap(numpy.eye(10), colors="viridis")
+    assert image.get_cmap().name == "viridis"
+    assert fig.labels["fig"] == []
+    fig.close()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The layout passes scale linearly in the number of axes"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import matplotlib.backends.backend_agg
+import matplotlib.text
+
+import pyfig
+
+# settings which enable all label passes of the layout
+LABELS = {"bottom_labels": True, "left_labels": True, "abc_labels": True,
+          "single_xlabel": True, "single_ylabel": True}
+
+
+def make_grid(rows, cols, settings=None):
+    """A figure with a grid of rows x cols labelled axes"""
+    fig = pyfig.Figure(dict({"rows": [1] * rows, "cols": [1] * cols,
+                             "figsize": [2 * cols, 2 * rows]},
+                            **(settings or {})), check=True)
+    for row in range(rows):
+        for col in range(cols):
+            ax = fig.add_ax(row, col)
+            ax.plot([0, 1, 2], [row, col, 1], label="series")
+            ax.set_xlabel("x {0}".format(col))
+            ax.set_ylabel("y {0}".format(row))
+    return fig
+
+
+def count_extents(fig, monkeypatch):
+    """The number of text extents measured by fig.layout()"""
+    calls = []
+    extent = matplotlib.text.Text.get_window_extent
+
+    def counted(self, *args, **kwargs):
+        """Count and measure"""
+        calls.append(self)
+        return extent(self, *args, **kwargs)
+    monkeypatch.setattr(matplotlib.text.Text, "get_window_extent", counted)
+    fig.layout()
+    monkeypatch.undo()
+    return len(calls)
+
+
+def test_linear(monkeypatch):
+    """Four times the axes measure about four times the texts"""
+    small = count_extents(make_grid(2, 4, LABELS), monkeypatch)
+    large = count_extents(make_grid(8, 4, LABELS), monkeypatch)
+    assert large < 5 * small
+
+
+def test_save_after_layout(tmpdir):
+    """save() after layout() does not add the title, date and legend
+       again"""
+    fig = make_grid(1, 2, {"title": "Title", "date": "2020"})
+    fig.layout()
+    texts = [text.get_text() for text in fig.texts]
+    legends = len(fig.legends)
+    fig.save(str(tmpdir.join("figure.png")))
+    assert [text.get_text() for text in fig.texts] == texts
+    assert len(fig.legends) == legends == 1
+
+
+def test_no_pixels(monkeypatch):
+    """The layout passes measure, and do not draw any pixels"""
+
+    def draw_path(*args, **kwargs):
+        """Fail on drawing"""
+        raise AssertionError("drawn while measuring")
+    monkeypatch.setattr(matplotlib.backends.backend_agg.RendererAgg,
+                        "draw_path", draw_path)
+    make_grid(2, 2, LABELS).layout()
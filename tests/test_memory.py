@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The memory used to draw figures"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import gc
+import logging
+import os
+import tracemalloc
+
+import matplotlib.figure
+import numpy
+import pytest
+
+import pyfig
+from pyfig import tools
+
+# the growth of the resident memory (MB) which is not a leak (the
+# allocator takes memory in blocks)
+MAX_NOISE = 2
+# the growth of the resident memory (bytes) per saved figure
+MAX_FIGURE_GROWTH = 1024
+# the number of values of the inputs of the peak memory tests
+SIZE = 10 ** 6
+
+
+def get_rss():
+    """The resident memory (MB) of this process"""
+    with open("/proc/self/statm") as fobj:
+        pages = int(fobj.read().split()[1])
+    return pages * os.sysconf(str("SC_PAGE_SIZE")) / 2 ** 20
+
+
+def get_peak(func, *args):
+    """The peak memory (bytes) allocated by func(*args)"""
+    tracemalloc.start()
+    try:
+        func(*args)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.fixture
+def memmap(tmpdir):
+    """A read-only memmap with SIZE values"""
+    fname = str(tmpdir.join("data.dat"))
+    numpy.arange(SIZE, dtype=float).tofile(fname)
+    return numpy.memmap(fname, dtype=float, mode="r", shape=(SIZE,))
+
+
+def test_views(memmap):
+    """Memmaps and buffers are not copied"""
+    assert get_peak(tools.as_array, memmap) < 1024
+    assert numpy.shares_memory(tools.as_array(memmap), memmap)
+    buf = memoryview(numpy.arange(SIZE, dtype=float))
+    assert get_peak(tools.as_array, buf) < 1024
+    assert get_peak(tools.as_array, list(memmap[:1000])) > 8000
+
+
+@pytest.mark.parametrize("func", ["plot", "errorbar"])
+@pytest.mark.parametrize("as_list", [False, True])
+def test_plot_peak(memmap, func, as_list):
+    """The wrappers do not copy the data on top of matplotlib"""
+    data = list(memmap) if as_list else memmap
+    fig = pyfig.Figure({"rows": [1], "cols": [1]}, check=True)
+    ax = fig.add_ax(0, 0)
+    plain = matplotlib.figure.Figure().add_subplot(111)
+    peak = get_peak(getattr(ax, func), data, data)
+    # less than a copy of the data
+    assert peak < get_peak(getattr(plain, func), data, data) + 4 * SIZE
+
+
+def save_figures(number, fname):
+    """Save number figures to fname, closing each figure"""
+    rng = numpy.random.RandomState(0)
+    for _ in range(number):
+        with pyfig.Figure({"rows": [1], "cols": [1]}, check=True) as fig:
+            ax = fig.add_ax(0, 0)
+            ax.plot(numpy.arange(100), rng.randn(100).cumsum(),
+                    label="series")
+            fig.save(fname)
+    gc.collect()
+
+
+def check_growth(warm, number, monkeypatch, tmpdir):
+    """The resident memory grows by less than MAX_FIGURE_GROWTH per
+       figure when number figures are saved (after warm figures)"""
+    # pytest keeps all log records, such as the warnings of findfont
+    # for missing font families
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+    fname = str(tmpdir.join("soak.png"))
+    # warm up the caches of matplotlib (fonts, text layouts)
+    save_figures(warm, fname)
+    rss = get_rss()
+    save_figures(number, fname)
+    growth = (get_rss() - rss) * 2 ** 20
+    assert growth < MAX_NOISE * 2 ** 20 + number * MAX_FIGURE_GROWTH
+
+
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"),
+                    reason="needs /proc")
+def test_soak(tmpdir, monkeypatch):
+    """The resident memory stays flat when many figures are saved"""
+    check_growth(50, 100, monkeypatch, tmpdir)
+
+
+@pytest.mark.slow
+@pytest.mark.skipif(not os.path.exists("/proc/self/statm"),
+                    reason="needs /proc")
+def test_soak_long(tmpdir, monkeypatch):
+    """Thousands of figures (about 6 minutes, run with --slow)"""
+    check_growth(500, 2000, monkeypatch, tmpdir)
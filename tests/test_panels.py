@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The parallel render of the axes equals the serial render"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import numpy
+import pytest
+
+import pyfig
+import pyfig.panels
+
+
+def make_figure(panel_jobs, twin=False):
+    """A figure with a grid of axes (and twin axes)"""
+    fig = pyfig.Figure({"rows": [1, 1], "cols": [1, 1],
+                        "panel_jobs": panel_jobs}, check=True)
+    rng = numpy.random.RandomState(0)
+    for row in range(2):
+        for col in range(2):
+            ax = fig.add_ax(row, col)
+            ax.plot(numpy.arange(100), rng.randn(100).cumsum(),
+                    color="mix", label="series {0}".format(col))
+            if twin:
+                fig.add_ax2(ax).plot(numpy.arange(100),
+                                     rng.randn(100).cumsum() * 10,
+                                     color="red")
+    fig.layout()
+    return fig
+
+
+@pytest.mark.parametrize("twin", [False, True])
+def test_parallel_equals_serial(twin):
+    """Render with panel_jobs 1 and 2"""
+    serial = make_figure(1, twin).render_rgba(100)
+    fig = make_figure(2, twin)
+    parallel = pyfig.panels.render_rgba(fig, 100, 2)
+    assert parallel.shape == serial.shape
+    assert (parallel != serial).any(axis=-1).sum() == 0
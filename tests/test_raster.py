@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The png options of pyfig.raster decode to the same pixels"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import io
+
+import numpy
+import pytest
+
+from pyfig import raster
+
+PIL_IMAGE = pytest.importorskip("PIL.Image")
+
+
+def make_rgba(colors):
+    """A (height, width, 4) image with at most colors colors"""
+    rng = numpy.random.RandomState(0)
+    palette = rng.randint(0, 256, (colors, 4)).astype(numpy.uint8)
+    return palette[rng.randint(0, colors, (37, 53))]
+
+
+@pytest.mark.parametrize("options", [
+    {"level": 0}, {"level": 9}, {"png_filter": "sub"},
+    {"png_filter": "up"}, {"png_filter": "paeth"},
+    {"strategy": "huffman"}, {"strategy": "rle"},
+    {"max_colors": 16}, {"max_colors": 256}])
+def test_png(options):
+    """The decoded png equals the image"""
+    rgba = make_rgba(100)
+    fobj = io.BytesIO()
+    raster.write_png(fobj, rgba, **options)
+    fobj.seek(0)
+    image = PIL_IMAGE.open(fobj)
+    if options.get("max_colors", 0) >= 100:
+        assert image.mode == "P"
+    assert (numpy.asarray(image.convert("RGBA")) == rgba).all()
+
+
+@pytest.mark.parametrize("ext", [".png", ".tif"])
+def test_dpi(ext):
+    """The resolution is written in the metadata"""
+    rgba = make_rgba(10)
+    fobj = io.BytesIO()
+    writer = raster.get_writer(fobj, ext, rgba.shape[1], rgba.shape[0],
+                               dpi=150)
+    writer.write(rgba)
+    writer.close()
+    fobj.seek(0)
+    image = PIL_IMAGE.open(fobj)
+    assert (numpy.asarray(image.convert("RGBA")) == rgba).all()
+    assert numpy.allclose([float(dpi) for dpi in image.info["dpi"]],
+                          150, atol=0.02)
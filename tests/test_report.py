@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""pyfig.Report: a multi-page pdf, one figure at a time"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+import re
+
+import numpy
+import pytest
+
+import pyfig
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def make_figure(figsize, number):
+    """A figure with a line and labels"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1], "figsize": list(figsize),
+                        "title": "page {0}".format(number)}, check=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.arange(50), numpy.arange(50) ** 0.5 * number,
+            label="cases")
+    ax.set_xlabel("week")
+    ax.set_ylabel("cases")
+    return fig
+
+
+def get_pages(fname):
+    """The sizes (points) of the pages and the number of fonts"""
+    with open(fname, "rb") as fobj:
+        content = fobj.read()
+    sizes = [tuple(float(value) for value in match.split())
+             for match in re.findall(br"/MediaBox \[ *0 0 ([\d. ]+?) *\]",
+                                     content)]
+    return sizes, len(re.findall(br"/Type /Font\b", content))
+
+
+def write_report(fname, figsizes):
+    """A report with a page for each figsize"""
+    figures = []
+    with pyfig.Report(fname) as report:
+        for number, figsize in enumerate(figsizes):
+            figures.append(make_figure(figsize, number + 1))
+            report.add(figures[-1])
+        assert report.npages == len(figsizes)
+    return figures
+
+
+def test_pages(tmpdir):
+    """A page for each figure with its size, the figures are closed"""
+    fname = str(tmpdir.join("sub", "report.pdf"))
+    figures = write_report(fname, [(4, 3), (6, 4), (4, 3)])
+    sizes, _fonts = get_pages(fname)
+    assert sizes == [(288, 216), (432, 288), (288, 216)]
+    for fig in figures:
+        assert fig.axes == [] and fig.labels == {}
+
+
+def test_fonts_once(tmpdir):
+    """The fonts are embedded once, not for every page"""
+    write_report(str(tmpdir.join("one.pdf")), [(4, 3)])
+    write_report(str(tmpdir.join("many.pdf")), [(4, 3)] * 5)
+    _sizes, fonts = get_pages(str(tmpdir.join("one.pdf")))
+    sizes, many = get_pages(str(tmpdir.join("many.pdf")))
+    assert len(sizes) == 5
+    assert many == fonts > 0
+
+
+def test_keep_figure(tmpdir):
+    """With close=False the figure can be saved again"""
+    fname = str(tmpdir.join("report.pdf"))
+    fig = make_figure((4, 3), 1)
+    with pyfig.Report(fname) as report:
+        report.add(fig, close=False)
+        report.add(fig)
+    assert get_pages(fname)[0] == [(288, 216)] * 2
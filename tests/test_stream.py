@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Axes.plot_stream and the chunks and bins of pyfig.stream"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig import stream
+
+XDATA = numpy.linspace(-5, 15, 10001)
+YDATA = numpy.sin(XDATA) * XDATA
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+@pytest.fixture
+def sources(tmpdir):
+    """The data as csv, npy, function and list of chunks"""
+    data = numpy.column_stack((XDATA, YDATA))
+    numpy.savetxt(str(tmpdir.join("data.csv")), data, delimiter=",")
+    numpy.save(str(tmpdir.join("data.npy")), data)
+    return {"csv": str(tmpdir.join("data.csv")),
+            "npy": str(tmpdir.join("data.npy")),
+            "function": lambda: (data[start:start + 999]
+                                 for start in range(0, len(data), 999)),
+            "chunks": [(XDATA[:5000], YDATA[:5000]),
+                       (XDATA[5000:], YDATA[5000:])]}
+
+
+@pytest.mark.parametrize("kind", ["csv", "npy", "function", "chunks"])
+def test_iter_chunks(sources, kind):
+    """All data is read, in chunks of at most chunksize"""
+    chunks = list(stream.iter_chunks(sources[kind], chunksize=3000))
+    if kind in ("csv", "npy"):
+        assert [len(xvals) for xvals, _yvals in chunks] == [
+            3000, 3000, 3000, 1001]
+    assert numpy.allclose(numpy.concatenate([xvals for xvals, _ in chunks]),
+                          XDATA)
+    assert numpy.allclose(numpy.concatenate([yvals for _, yvals in chunks]),
+                          YDATA)
+
+
+def test_iter_chunks_finite():
+    """Points with a nan or inf are left out"""
+    chunk = numpy.array([[0, 1], [1, numpy.nan], [numpy.inf, 2], [3, 4]])
+    (xvals, yvals), = stream.iter_chunks([chunk])
+    assert list(xvals) == [0, 3] and list(yvals) == [1, 4]
+
+
+def test_bin_stream(sources):
+    """The min, max and mean of each bin, empty bins left out"""
+    centers, mins, maxs, means = stream.bin_stream(
+        sources["function"], 0, 20, 40)
+    # no data beyond 15 (in the bin from 15 to 15.5)
+    assert len(centers) == 31
+    assert numpy.allclose(centers, numpy.arange(31) * 0.5 + 0.25)
+    index = numpy.minimum((XDATA[XDATA >= 0] * 2).astype(int), 39)
+    yvals = YDATA[XDATA >= 0]
+    for nbin in (0, 7, 30):
+        assert mins[nbin] == yvals[index == nbin].min()
+        assert maxs[nbin] == yvals[index == nbin].max()
+        assert numpy.isclose(means[nbin], yvals[index == nbin].mean())
+    assert stream.get_extent(sources["npy"]) == (-5, 15)
+
+
+def make_axes():
+    """A figure with one axes"""
+    fig = pyfig.Figure({"rows": [1], "cols": [1], "figsize": [4, 3],
+                        "dpi": 100}, check=True)
+    return fig, fig.add_ax(0, 0)
+
+
+@pytest.mark.parametrize("xlim,expected", [
+    (None, (-5, 15)), ((0, None), (0, 15)), ((None, 5), (-5, 5)),
+    ((2, 4), (2, 4))])
+def test_plot_stream_xlim(sources, xlim, expected):
+    """The missing ends of xlim are taken from the data"""
+    fig, ax = make_axes()
+    line, = ax.plot_stream(sources["csv"], xlim=xlim, chunksize=2000)
+    xvals = line.get_xdata()
+    nbins = int(ax.get_axpos()[2] * 400)
+    width = (expected[1] - expected[0]) / nbins
+    assert len(xvals) == nbins
+    assert numpy.isclose(xvals[0], expected[0] + width / 2)
+    assert numpy.isclose(xvals[-1], expected[1] - width / 2)
+    # the envelope is drawn with the color of the line
+    assert len(ax.collections) == 1
+    fig.close()
+
+
+def test_plot_stream_manual_xlim(sources):
+    """Without xlim, the xlim set before is used"""
+    fig, ax = make_axes()
+    ax.set_xlim(0, 10)
+    line, = ax.plot_stream(sources["chunks"], envelope=0)
+    assert 0 < line.get_xdata().min() < line.get_xdata().max() < 10
+    assert len(ax.collections) == 0
+    fig.close()
+
+
+def test_plot_stream_chunks_need_xlim(sources):
+    """A list of chunks cannot be read twice to find the extent"""
+    fig, ax = make_axes()
+    with pytest.raises(pyfig.PyfigError):
+        ax.plot_stream(iter(sources["chunks"]))
+    with pytest.raises(pyfig.PyfigError):
+        ax.plot_stream(iter(sources["chunks"]), xlim=(0, None))
+    fig.close()
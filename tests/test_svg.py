@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The compact svg output is smaller and draws the same text"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import gzip
+import os
+import re
+
+import matplotlib
+import numpy
+
+import pyfig
+
+SCALE = re.compile(br"scale\([^)]*\)")
+
+
+def save_svg(tmpdir, name, settings=None):
+    """Save a figure with text and lines as name, return the svg"""
+    fig = pyfig.Figure(dict({"rows": [1], "cols": [1]}, **(settings or {})),
+                       check=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.linspace(0, 1, 200), numpy.sin(numpy.arange(200) / 9),
+            label="sine")
+    ax.set_xlabel("time")
+    fname = str(tmpdir.join(name))
+    fig.save(fname)
+    if name.endswith(".svgz"):
+        with gzip.open(fname, "rb") as fobj:
+            return fname, fobj.read()
+    with open(fname, "rb") as fobj:
+        return fname, fobj.read()
+
+
+def test_smaller(tmpdir):
+    """Rounded coordinates and compression make the output smaller"""
+    default, svg = save_svg(tmpdir, "default.svg")
+    rounded, _ = save_svg(tmpdir, "rounded.svg", {"svg_precision": 1})
+    compressed, svgz = save_svg(tmpdir, "compressed.svgz")
+    assert os.path.getsize(rounded) < os.path.getsize(default)
+    assert os.path.getsize(compressed) < 0.5 * os.path.getsize(default)
+    assert svgz.startswith(b"<?xml")
+    # the glyphs are defined once and used for each character
+    assert b"<defs>" in svg and b"<use " in svg
+
+
+def test_text_size(tmpdir):
+    """Rounding keeps the scale of the glyphs"""
+    _, svg = save_svg(tmpdir, "default.svg")
+    for precision in (0, 1):
+        _, rounded = save_svg(tmpdir, "rounded.svg",
+                              {"svg_precision": precision})
+        assert SCALE.findall(rounded) == SCALE.findall(svg)
+        assert len(SCALE.findall(rounded)) > 0
+
+
+def test_fonttype(tmpdir):
+    """The svg.fonttype rc is used, unless svg_fonttype is set"""
+    with matplotlib.rc_context({"svg.fonttype": "none"}):
+        _, svg = save_svg(tmpdir, "rc.svg")
+        _, path = save_svg(tmpdir, "path.svg", {"svg_fonttype": "path"})
+    assert b"<text" in svg
+    assert b"<text" not in path
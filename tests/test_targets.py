@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Saving a list of (dpi, figname) targets from one layout"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import numpy
+import pytest
+
+import pyfig
+from pyfig import budget, raster
+
+PIL_IMAGE = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def make_figure(settings=None):
+    """A small figure with one line"""
+    fig = pyfig.Figure(dict({"rows": [1], "cols": [1], "figsize": [4, 3],
+                             "dpi": 100}, **(settings or {})), check=True)
+    ax = fig.add_ax(0, 0)
+    ax.plot(numpy.arange(100), numpy.sin(numpy.arange(100) / 10),
+            label="sin")
+    return fig
+
+
+def load(path):
+    """The rgba pixels of an image"""
+    return numpy.asarray(PIL_IMAGE.open(str(path)).convert("RGBA"))
+
+
+def get_methods(result):
+    """The method of each target by figname basename"""
+    return {target["figname"].split("/")[-1]: target["method"]
+            for target in result["targets"]}
+
+
+def test_downscale_from_rendered_dpi(tmpdir, monkeypatch):
+    """The factor is taken from the rendered raster image, not from the
+       larger pdf target"""
+    monkeypatch.setattr(raster, "DOWNSCALE_RATE", float("inf"))
+    with make_figure() as fig:
+        result = fig.save([(300, str(tmpdir.join("x.pdf"))),
+                           ("2x", str(tmpdir.join("a.png"))),
+                           (100, str(tmpdir.join("b.png")))])
+    assert get_methods(result) == {"x.pdf": "savefig", "a.png": "render",
+                                   "b.png": "downscale"}
+    large = load(tmpdir.join("a.png"))
+    small = load(tmpdir.join("b.png"))
+    assert large.shape == (600, 800, 4)
+    assert small.shape == (300, 400, 4)
+    assert (small == raster.downscale(large, 2)).all()
+    assert tmpdir.join("x.pdf").read_binary().startswith(b"%PDF")
+
+
+def test_resize(tmpdir, monkeypatch):
+    """A target which is not an integer factor smaller is resized"""
+    monkeypatch.setattr(raster, "RESIZE_RATE", float("inf"))
+    with make_figure() as fig:
+        result = fig.save([(150, str(tmpdir.join("a.png"))),
+                           ("1x", str(tmpdir.join("b.webp")))])
+    assert get_methods(result) == {"a.png": "render", "b.webp": "resize"}
+    assert load(tmpdir.join("b.webp")).shape == (300, 400, 4)
+
+
+def test_render_when_faster(tmpdir, monkeypatch):
+    """The targets are rendered again when scaling is slower"""
+    monkeypatch.setattr(raster, "DOWNSCALE_RATE", 1e-6)
+    monkeypatch.setattr(raster, "RESIZE_RATE", 1e-6)
+    with make_figure() as fig:
+        result = fig.save([("2x", str(tmpdir.join("a.png"))),
+                           (100, str(tmpdir.join("b.png"))),
+                           (75, str(tmpdir.join("c.png"))),
+                           (75, str(tmpdir.join("d.tif")))])
+    assert get_methods(result) == {"a.png": "render", "b.png": "render",
+                                   "c.png": "render", "d.tif": "copy"}
+    assert load(tmpdir.join("b.png")).shape == (300, 400, 4)
+    assert (load(tmpdir.join("c.png")) == load(tmpdir.join("d.tif"))).all()
+
+
+def test_budget_counts_raster_canvas(tmpdir):
+    """The canvas of the largest raster target is in the estimate,
+       also when the largest target is a pdf"""
+    with make_figure() as fig:
+        result = fig.save([(600, str(tmpdir.join("x.pdf"))),
+                           (200, str(tmpdir.join("a.png")))])
+        canvas = 2 * fig.get_figwidth() * fig.get_figheight() * 200 ** 2 * 4
+        assert result["estimate"] >= canvas
+        assert result["estimate"] >= budget.estimate(fig, 200, ".png")
+
+
+def test_budget_error_for_raster_target(tmpdir):
+    """A pdf within the budget, with a png over it, is not saved"""
+    with make_figure({"memory_budget": 4}) as fig:
+        assert budget.estimate(fig, 600, ".pdf") < 2 ** 22
+        with pytest.raises(pyfig.PyfigError):
+            fig.save([(600, str(tmpdir.join("x.pdf"))),
+                      (400, str(tmpdir.join("a.png")))])
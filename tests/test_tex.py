@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""The dvi file of all usetex strings splits into one file per page"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import struct
+
+import matplotlib.dviread
+
+from pyfig import tex
+
+PREAMBLE = struct.pack(">BBIIIB", tex.PRE, 2, 25400000, 473628672, 1000, 0)
+RULE = struct.pack(">Bii", tex.SET_RULE, 65536, 131072)
+FONTDEF = (struct.pack(">BBIIIBB", tex.FNT_DEF_1, 5, 0, 655360, 655360,
+                       0, 4) + b"cmr1")
+
+
+def make_dvi(pages):
+    """A dvi file with pages (the commands between bop and eop)"""
+    data = PREAMBLE
+    previous = -1
+    for number, commands in enumerate(pages):
+        start = len(data)
+        data += (struct.pack(">B10ii", tex.BOP, number + 1,
+                             *([0] * 9 + [previous])) +
+                 commands + struct.pack(">B", tex.EOP))
+        previous = start
+    post = len(data)
+    data += (struct.pack(">BIIIIIIHH", tex.POST, previous, 25400000,
+                         473628672, 1000, 2 ** 20, 2 ** 20, 2, len(pages)) +
+             FONTDEF)
+    size = len(data) + 6
+    return (data + struct.pack(">BIB", tex.POST_POST, post, 2) +
+            b"\xdf" * (4 + -size % 4))
+
+
+def get_commands(data):
+    """The opcodes and fonts of the commands of data"""
+    pos = 0
+    commands = []
+    while bytearray(data)[pos] != tex.POST_POST:
+        commands.append((bytearray(data)[pos], tex.get_font(data, pos)))
+        pos += tex.command_length(data, pos)
+    return commands
+
+
+def test_split_pages(tmpdir):
+    """Every page is a dvi file of one page, which matplotlib reads"""
+    special = struct.pack(">BB", tex.XXX_1, 2) + b"hi"
+    files = tex.split_dvi(make_dvi([RULE + special, RULE + RULE]))
+    assert len(files) == 2
+    for index, data in enumerate(files):
+        assert len(data) % 4 == 0
+        fname = str(tmpdir.join("{0}.dvi".format(index)))
+        with open(fname, "wb") as fobj:
+            fobj.write(data)
+        with matplotlib.dviread.Dvi(fname, 72) as dvi:
+            pages = list(dvi)
+        assert len(pages) == 1
+        assert len(pages[0].boxes) == index + 1
+
+
+def test_split_fonts():
+    """A page defines the fonts which an earlier page defined"""
+    select = struct.pack(">BB", tex.FNT_1, 5)
+    files = tex.split_dvi(make_dvi([FONTDEF + select + b"A",
+                                    select + b"B"]))
+    for data in files:
+        commands = get_commands(data)
+        opcodes = [opcode for opcode, _ in commands]
+        assert opcodes.count(tex.FNT_DEF_1) == 2
+        assert opcodes.index(tex.FNT_DEF_1) < opcodes.index(tex.FNT_1)
+        assert commands[opcodes.index(tex.FNT_DEF_1)][1] == 5
+        post = opcodes.index(tex.POST)
+        assert tex.FNT_DEF_1 in opcodes[post:]
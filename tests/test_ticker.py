@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Identical axes share the ticks"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import datetime
+
+import dateutil.tz
+import matplotlib.dates
+
+import pyfig
+from pyfig import ticker
+
+
+def test_signature():
+    """The signature compares the configuration, not the identity"""
+    month = ticker.signature(matplotlib.dates.MonthLocator())
+    assert ticker.signature(matplotlib.dates.MonthLocator()) == month
+    assert ticker.signature(
+        matplotlib.dates.MonthLocator(interval=2)) != month
+    assert ticker.signature(matplotlib.dates.MonthLocator(
+        tz=dateutil.tz.tzoffset(None, 3600))) != month
+
+
+def test_shared_dates():
+    """The ticks of identical date axes are computed once"""
+    fig = pyfig.Figure({"rows": [1, 1, 1], "cols": [1]}, check=True)
+    dates = [datetime.datetime(2020, 1, 1) + datetime.timedelta(days=day)
+             for day in range(365)]
+    for row in range(3):
+        ax = fig.add_ax(row, 0)
+        ax.plot(dates, range(365))
+        ax.xaxis.set_major_locator(matplotlib.dates.MonthLocator())
+    fig.layout()
+    keys = [key for key in fig.tick_cache
+            if key[0] == "locs" and key[1][0] == "MonthLocator"]
+    assert len(keys) == len(set(key[2] for key in keys))
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+# -*-coding: utf-8-*-
+
+# Copyright 2004-2016 Sander van Noort
+# Licensed under GPLv3 (see LICENSE.txt)
+
+"""Figures rendered in horizontal bands (tile_height) equal the figures
+rendered at once"""
+
+from __future__ import (division, absolute_import, unicode_literals,
+                        print_function)
+
+import logging
+
+import numpy
+import pytest
+
+import pyfig
+
+PIL_IMAGE = pytest.importorskip("PIL.Image")
+
+
+@pytest.fixture(autouse=True)
+def quiet_fonts(monkeypatch):
+    """No findfont warnings for the missing fonts"""
+    monkeypatch.setattr(logging.getLogger("matplotlib.font_manager"),
+                        "disabled", True)
+
+
+def save(fname, tile_height):
+    """Save a figure with two axes and a figure legend"""
+    with pyfig.Figure({"rows": [1, 1], "cols": [1], "figsize": [4, 3],
+                       "dpi": 150, "tile_height": tile_height},
+                      check=True) as fig:
+        for row in range(2):
+            ax = fig.add_ax(row, 0)
+            ax.plot(numpy.arange(100), numpy.sin(numpy.arange(100) / 10),
+                    label="sin")
+            ax.set_xlabel("time")
+        fig.save(fname)
+    return PIL_IMAGE.open(fname)
+
+
+@pytest.mark.parametrize("ext", [".png", ".tif"])
+def test_tiled(tmpdir, ext):
+    """The same pixels (up to rounding) and resolution, in bands which do
+       not divide the height"""
+    whole = save(str(tmpdir.join("whole" + ext)), 0)
+    tiled = save(str(tmpdir.join("tiled" + ext)), 37)
+    assert tiled.size == whole.size == (600, 450)
+    assert numpy.allclose([float(dpi) for dpi in tiled.info["dpi"]],
+                          [float(dpi) for dpi in whole.info["dpi"]],
+                          atol=0.02)
+    diff = numpy.abs(
+        numpy.asarray(tiled.convert("RGBA")).astype(int) -
+        numpy.asarray(whole.convert("RGBA")).astype(int)).max(axis=2)
+    assert diff.max() <= 1
+    assert (diff > 0).mean() < 1e-3